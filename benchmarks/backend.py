@@ -0,0 +1,72 @@
+import time
+import random
+import threading
+
+import numpy as np
+
+from scaut.scan.decorators import add_noise
+
+
+class FakeBackend:
+    def __init__(self, motors, meters, response=None, offsets=None, latency=0.0, jitter=0.0, noise_level=0.0,
+                 failure_rate=0.0, seed=0):
+        self.motors = list(motors)
+        self.meters = list(meters)
+        rng = np.random.default_rng(seed)
+        self.response = (np.asarray(response, dtype=float) if response is not None
+                         else rng.normal(size=(len(self.meters), len(self.motors))))
+        self.offsets = np.asarray(offsets, dtype=float) if offsets is not None else rng.normal(size=len(self.meters))
+        self.latency = float(latency)
+        self.jitter = float(jitter)
+        self.failure_rate = float(failure_rate)
+        self.state = dict.fromkeys(self.motors, 0.0)
+        self.calls = {"get": 0, "put": 0, "failures": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._motor_index = {motor: i for i, motor in enumerate(self.motors)}
+        self._meter_index = {meter: i for i, meter in enumerate(self.meters)}
+        self._read = add_noise(noise_level)(self.value)
+
+    def value(self, name):
+        if name in self._motor_index:
+            return self.state[name]
+        motor_values = np.array([self.state[motor] for motor in self.motors])
+        i = self._meter_index[name]
+        return float(self.response[i] @ motor_values + self.offsets[i])
+
+    def _call(self, kind, count=1):
+        with self._lock:
+            self.calls[kind] += count
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter)) if self.latency or self.jitter else 0.0
+            failed = self.failure_rate and self._random.random() < self.failure_rate
+            if failed:
+                self.calls["failures"] += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise IOError(f"Simulated {kind} failure")
+
+    def read(self, name):
+        return self.value(name) if name in self._motor_index else self._read(name)
+
+    def get(self, name):
+        self._call("get")
+        return self.read(name)
+
+    def put(self, name, value):
+        self._call("put")
+        with self._lock:
+            self.state[name] = value
+
+
+class BulkFakeBackend(FakeBackend):
+    def get_many(self, names):
+        names = list(names)
+        self._call("get", len(names))
+        return [self.read(name) for name in names]
+
+    def put_many(self, names, values):
+        names = list(names)
+        self._call("put", len(names))
+        with self._lock:
+            self.state.update(zip(names, values))
@@ -0,0 +1,137 @@
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import itertools
+import tracemalloc
+
+from scaut.scan import scan, reply, optimize, fit
+from scaut.scan.hooks import TimingCollector
+
+from .backend import FakeBackend, BulkFakeBackend
+
+SCAN_FUNCS = {"scan": scan, "reply": reply, "optimize": optimize, "fit": fit}
+PHASES = ("put", "settle", "wait", "read", "other")
+
+
+def build_kwargs(func_name, backend, points):
+    meters = [(meter, [-1e9, 1e9]) for meter in backend.meters]
+    if func_name == "scan":
+        motors = [(backend.motors[0], [float(i) for i in range(points)])]
+        motors += [(motor, [0.0]) for motor in backend.motors[1:]]
+    else:
+        motors = [(motor, [0.0, 1.0]) for motor in backend.motors]
+    kwargs = {"meters": meters, "motors": motors}
+    if func_name == "fit":
+        kwargs["checks"] = [(motor, [-10.0, 10.0]) for motor in backend.motors]
+    return kwargs
+
+
+def run_case(case, args):
+    random.seed(args.seed)
+    backend_class = BulkFakeBackend if case["bulk"] else FakeBackend
+    backend = backend_class(
+        [f"SIM:MOTOR{i}" for i in range(case["motors"])], [f"SIM:METER{i}" for i in range(case["meters"])],
+        latency=args.latency, jitter=args.jitter, noise_level=args.noise, failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    collector = TimingCollector()
+    kwargs = build_kwargs(case["func"], backend, args.points)
+    if args.memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    error = None
+    try:
+        SCAN_FUNCS[case["func"]](
+            **kwargs, get_func=backend.get, put_func=backend.put, sample_size=case["sample_size"],
+            parallel=case["parallel"], verify_motor=case["verify_motor"], delay=args.delay,
+            tolerance=args.tolerance, io_retries=args.retries, hooks=[collector],
+        )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if args.memory else None
+    if args.memory:
+        tracemalloc.stop()
+    summary = collector.summary()
+    steps = len(collector.timings)
+    return {
+        **case,
+        "steps": steps,
+        "wall": wall,
+        "steps_per_sec": steps / wall if wall else float("nan"),
+        **{f"{phase}_time": summary[phase]["total"] for phase in PHASES},
+        "peak_memory_mb": peak / 2 ** 20 if peak is not None else None,
+        "gets": backend.calls["get"],
+        "puts": backend.calls["put"],
+        "failures": backend.calls["failures"],
+        "error": error,
+    }
+
+
+def iter_cases(args):
+    keys = ["func", "motors", "meters", "sample_size", "parallel", "verify_motor", "bulk"]
+    values = [args.funcs, args.motors, args.meters, args.sample_size, args.parallel, args.verify_motor, args.bulk]
+    for combination in itertools.product(*values):
+        yield dict(zip(keys, combination))
+
+
+def print_report(results):
+    columns = ["func", "motors", "meters", "sample_size", "parallel", "verify_motor", "bulk", "steps",
+               "steps_per_sec", "wall", *[f"{phase}_time" for phase in PHASES], "peak_memory_mb", "error"]
+    rows = [[format_cell(result[column]) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return "" if value is None else str(value)
+
+
+def parse_args(argv=None):
+    flags = lambda value: bool(int(value))
+    parser = argparse.ArgumentParser(description="Benchmark the scan engine against a simulated device backend.")
+    parser.add_argument("--funcs", nargs="+", default=["scan"], choices=list(SCAN_FUNCS))
+    parser.add_argument("--motors", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--meters", nargs="+", type=int, default=[4, 32])
+    parser.add_argument("--sample-size", nargs="+", type=int, default=[1, 5])
+    parser.add_argument("--parallel", nargs="+", type=flags, default=[False, True])
+    parser.add_argument("--verify-motor", nargs="+", type=flags, default=[True])
+    parser.add_argument("--bulk", nargs="+", type=flags, default=[False])
+    parser.add_argument("--points", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    parser.add_argument("--latency", type=float, default=0.001)
+    parser.add_argument("--jitter", type=float, default=0.0005)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--retries", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--memory", type=flags, default=True)
+    parser.add_argument("--warmup", type=flags, default=True)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger('Scan').setLevel(logging.WARNING)
+    cases = list(iter_cases(args))
+    if args.warmup and cases:
+        run_case(cases[0], args)
+    results = [run_case(case, args) for case in cases]
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f_out:
+            json.dump(results, f_out, indent=2)
+    return 1 if any(result["error"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
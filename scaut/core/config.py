@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 from logging import config as logging_config
 
 from .logger import LOGGING
@@ -14,12 +15,20 @@ DATA_DIR = os.path.abspath(os.environ.get("DATA_DIR", "data"))
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
+SNAPSHOT_DIR = os.path.abspath(os.environ.get("SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshots")))
+
 TQDM_DISABLE = os.environ.get("TQDM_DISABLE", True)
 
 SCAN_SHOW_LAST_STEP_NUMBERS =  os.environ.get("SCAN_SHOW_LAST_STEP_NUMBERS", 7)
 
 SCAN_SAMPLE_SIZE = os.environ.get("SCAN_SAMPLE_SIZE", 10)
 
+SCAN_MIN_SAMPLES = os.environ.get("SCAN_MIN_SAMPLES", 3)
+
+SCAN_KEEP_SAMPLES = os.environ.get("SCAN_KEEP_SAMPLES", False)
+
+SCAN_ROBUST_STATS = os.environ.get("SCAN_ROBUST_STATS", False)
+
 SCAN_RANDOM_STATE = os.environ.get("SCAN_RANDOM_STATE", 42)
 
 SCAN_BAYESIAN_OPTIMIZATION_N_CALLS = os.environ.get("SCAN_BAYESIAN_OPTIMIZATION_N_CALLS", 50)
@@ -44,10 +53,94 @@ SCAN_DELAY = os.environ.get("SCAN_DELAY", 0.1)
 
 SCAN_TOLERANCE = os.environ.get("SCAN_TOLERANCE", 1e-3)
 
+SCAN_SETTLE = os.environ.get("SCAN_SETTLE", False)
+
+SCAN_SETTLE_PROFILE = {"poll": 0.01, "backoff": 2.0, "max_poll": 0.5, "stable_reads": 2, "timeout": 10.0}
+
+SCAN_SETTLE_PROFILES = json.loads(os.environ.get("SCAN_SETTLE_PROFILES", "{}"))
+
 SCAN_PARALLEL = os.environ.get("SCAN_PARALLEL", False)
 
+SCAN_MAX_WORKERS = os.environ.get("SCAN_MAX_WORKERS", 16)
+
+SCAN_EPICS_TIMEOUT = os.environ.get("SCAN_EPICS_TIMEOUT", 5.0)
+
+SCAN_EPICS_CONNECTION_TIMEOUT = os.environ.get("SCAN_EPICS_CONNECTION_TIMEOUT", 5.0)
+
+SCAN_IO_TIMEOUT = os.environ.get("SCAN_IO_TIMEOUT", None)
+
+SCAN_IO_RETRIES = os.environ.get("SCAN_IO_RETRIES", 0)
+
+SCAN_IO_BACKOFF = os.environ.get("SCAN_IO_BACKOFF", 0.05)
+
+SCAN_IO_MAX_BACKOFF = os.environ.get("SCAN_IO_MAX_BACKOFF", 1.0)
+
+SCAN_BREAKER_THRESHOLD = os.environ.get("SCAN_BREAKER_THRESHOLD", 3)
+
+SCAN_BREAKER_RESET_TIME = os.environ.get("SCAN_BREAKER_RESET_TIME", 30.0)
+
+SCAN_BREAKER_SKIP = os.environ.get("SCAN_BREAKER_SKIP", False)
+
+SCAN_IO_RATE = os.environ.get("SCAN_IO_RATE", None)
+
+SCAN_IO_BURST = os.environ.get("SCAN_IO_BURST", None)
+
+SCAN_IO_MAX_IN_FLIGHT = os.environ.get("SCAN_IO_MAX_IN_FLIGHT", None)
+
+SCAN_IO_LIMITS = json.loads(os.environ.get("SCAN_IO_LIMITS", "{}"))
+
+SCAN_VERIFY_RESTORE = os.environ.get("SCAN_VERIFY_RESTORE", False)
+
+SCAN_STEP_CALLBACK_QUEUE = os.environ.get("SCAN_STEP_CALLBACK_QUEUE", 1)
+
+SCAN_TIMING = os.environ.get("SCAN_TIMING", False)
+
+SCAN_TRACE = os.environ.get("SCAN_TRACE", False)
+
+SCAN_METRICS = os.environ.get("SCAN_METRICS", False)
+
+SCAN_METRICS_FILE = os.environ.get("SCAN_METRICS_FILE", os.path.join(os.path.dirname(DATA_DIR), "scaut.prom"))
+
+SCAN_METRICS_PERIOD = os.environ.get("SCAN_METRICS_PERIOD", 15.0)
+
+SCAN_METRICS_BUCKETS = json.loads(os.environ.get(
+    "SCAN_METRICS_BUCKETS", "[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]"
+))
+
+SCAN_METRICS_PREFIXES = json.loads(os.environ.get("SCAN_METRICS_PREFIXES", "[]"))
+
+SCAN_MONITOR = os.environ.get("SCAN_MONITOR", False)
+
+SCAN_MONITOR_TIMEOUT = os.environ.get("SCAN_MONITOR_TIMEOUT", 5.0)
+
+SCAN_TRIGGER_POLL = os.environ.get("SCAN_TRIGGER_POLL", 0.001)
+
+SCAN_TRIGGER_TIMEOUT = os.environ.get("SCAN_TRIGGER_TIMEOUT", 5.0)
+
+SCAN_WATCHDOG = os.environ.get("SCAN_WATCHDOG", False)
+
+SCAN_WATCHDOG_PERIOD = os.environ.get("SCAN_WATCHDOG_PERIOD", 0.05)
+
+SCAN_WATCHDOG_ACTION = os.environ.get("SCAN_WATCHDOG_ACTION", "abort")
+
 SCAN_REPEAT = os.environ.get("SCAN_REPEAT", 1)
 
+SCAN_JOURNAL = os.environ.get("SCAN_JOURNAL", False)
+
+SCAN_RESULT_CAPACITY = os.environ.get("SCAN_RESULT_CAPACITY", 256)
+
+SCAN_RESULT_COLUMNS = os.environ.get("SCAN_RESULT_COLUMNS", 16)
+
+SCAN_ORDER = os.environ.get("SCAN_ORDER", "product")
+
+SCAN_GREEDY_MAX_POINTS = os.environ.get("SCAN_GREEDY_MAX_POINTS", 5000)
+
+SCAN_ESTIMATE_MAX_STEPS = os.environ.get("SCAN_ESTIMATE_MAX_STEPS", 100000)
+
+SCAN_DELTA_MOTORS = os.environ.get("SCAN_DELTA_MOTORS", True)
+
+SCAN_MOTOR_REFRESH_PERIOD = os.environ.get("SCAN_MOTOR_REFRESH_PERIOD", 0)
+
 SCAN_RESPONSE_MEASUREMENTS_RCOND = os.environ.get("SCAN_RESPONSE_MEASUREMENTS_RCOND", 1e-15)
 
 SCAN_RESPONSE_MEASUREMENTS_MAX_ATTEMPTS = os.environ.get("SCAN_RESPONSE_MEASUREMENTS_MAX_ATTEMPTS", 10)
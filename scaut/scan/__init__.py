@@ -1,5 +1,7 @@
 import os
+import time
 import itertools
+import contextlib
 from datetime import datetime
 from tqdm import tnrange, tqdm_notebook
 from tqdm.contrib import tzip
@@ -8,36 +10,104 @@ from ..core import config as cfg
 from .utils import (
     create_output_path,
     save_data,
+    create_journal_path,
+    open_journal,
+    write_journal_record,
+    compact_journal,
+    load_data,
+    count_done_combinations,
     set_motors_values,
     get_meters_data,
+    sample_meters,
+    check_limits,
     scan_logger,
 )
 from .decorators import response_measurements, bayesian_optimization, watch_measurements, least_squares_fitting
 from .exceptions import ScanValueError
+from .result import ScanResult, as_scan_result
+from .grid import ScanGrid, estimate_scan
+from .session import DeviceSession, with_session, with_snapshot_scope
+from .governor import IOGovernor
+from .snapshot import take_snapshot, save_snapshot, load_snapshot, restore_snapshot
+from .devices import DeviceAdapter, EpicsAdapter, GuardedDevice, CircuitBreaker, bulk_method
+from .monitor import MonitorCache, FakePublisher
+from .watchdog import CheckWatchdog
+from .callbacks import StepCallbackWorker
+from .hooks import ScanHooks, TimingCollector, as_hooks
+from .trace import ChromeTracer
+from .metrics import MetricsRegistry, default_registry
 
 
+@with_session
 def scan(meters, motors, checks=[], *, get_func, put_func, verify_motor=True, 
          max_retries=cfg.SCAN_MAX_TRIES, delay=cfg.SCAN_DELAY, tolerance=cfg.SCAN_TOLERANCE, 
          previous_scan=None, save=False, path=cfg.DATA_DIR, name=None,
          callback=[], save_original_motor_values=True, sample_size=cfg.SCAN_SAMPLE_SIZE,
          parallel=cfg.SCAN_PARALLEL, repeat=cfg.SCAN_REPEAT, strict_check=False,
+         journal=cfg.SCAN_JOURNAL, resume_from=None, order=cfg.SCAN_ORDER, slew_rates=None,
+         delta_motors=cfg.SCAN_DELTA_MOTORS, motor_refresh_period=cfg.SCAN_MOTOR_REFRESH_PERIOD,
+         session=None, keep_samples=cfg.SCAN_KEEP_SAMPLES, robust_stats=cfg.SCAN_ROBUST_STATS,
+         min_samples=cfg.SCAN_MIN_SAMPLES, max_samples=None, target_sem=None, target_rel_sem=None,
+         settle=cfg.SCAN_SETTLE, settle_profiles=None, monitor=cfg.SCAN_MONITOR, subscribe_func=None,
+         unsubscribe_func=None, trigger=None, watchdog=cfg.SCAN_WATCHDOG,
+         watchdog_period=cfg.SCAN_WATCHDOG_PERIOD, watchdog_action=cfg.SCAN_WATCHDOG_ACTION,
+         io_timeout=cfg.SCAN_IO_TIMEOUT, io_retries=cfg.SCAN_IO_RETRIES, snapshot=None, snapshot_name=None,
+         verify_restore=cfg.SCAN_VERIFY_RESTORE, step_callback=None, hooks=None, timing=cfg.SCAN_TIMING,
+         trace=cfg.SCAN_TRACE, metrics=cfg.SCAN_METRICS,
 ):
     data = previous_scan or {}
     original_motor_values = {}
+    if resume_from is not None:
+        data.update(load_data(resume_from) if isinstance(resume_from, str) else resume_from)
+        original_motor_values = data.get("original_motor_values", {})
+    device_get_func = get_func
+    tracer = trace if isinstance(trace, ChromeTracer) else ChromeTracer() if trace else None
+    registry = metrics if isinstance(metrics, MetricsRegistry) else default_registry if metrics else None
+    if registry is default_registry:
+        registry.start()
+    if registry is not None:
+        registry.inc("scaut_scans")
+    guarded = session.governor.active or tracer is not None or registry is not None
+    if io_timeout is not None or int(io_retries) or guarded:
+        device = GuardedDevice(
+            get_func, put_func, io_timeout, io_retries, session.breaker, session.call_executor,
+            governor=session.governor if session.governor.active else None, tracer=tracer, metrics=registry,
+        )
+        get_func, put_func = device.get, device.put
+    journal_file = None
+    monitor_cache = None
+    check_watchdog = None
+    step_worker = None
+    hooks = as_hooks(hooks, timing, tracer)
+    commanded_motor_values = {}
+    motor_steps = 0
     motor_names, motor_ranges = [motor[0] for motor in motors], [motor[1] for motor in motors]
     meter_names, meter_ranges = [meter[0] for meter in meters], [meter[1] for meter in meters]
     check_names, check_ranges = [check[0] for check in checks], [check[1] for check in checks]
-    all_combinations = list(itertools.product(*motor_ranges))
+    read_names = list(dict.fromkeys((check_names if not watchdog else []) + meter_names))
+    read_ranges = {**dict(zip(check_names, check_ranges)), **dict(zip(meter_names, meter_ranges))}
+    read_ranges = [read_ranges[read_name] for read_name in read_names]
+    all_combinations = ScanGrid(
+        motor_ranges, repeat, order,
+        slew_rates and [slew_rates.get(motor_name, 1.0) for motor_name in motor_names],
+    )
     
-    if save_original_motor_values:
+    if snapshot is not None:
+        original_motor_values = load_snapshot(snapshot) if isinstance(snapshot, str) else dict(snapshot)
+    if save_original_motor_values and not original_motor_values:
         try:
-            original_motor_values, _ = get_meters_data(motor_names, get_func, sample_size, delay, parallel)
+            original_motor_values = take_snapshot(motor_names, get_func, parallel, session)
         except Exception as e:
-            scan_logger.error(f"Error getting initial value for motor '{motor_name}': {e}")
-            raise RuntimeError(f"Failed to retrieve initial motor value for '{motor_name}'")
+            scan_logger.error(f"Error getting initial values for motors {motor_names}: {e}")
+            raise RuntimeError(f"Failed to retrieve initial motor values for {motor_names}")
+    if snapshot_name is not None:
+        data["snapshot"] = save_snapshot(original_motor_values, snapshot_name)
    
+    data["steps"] = as_scan_result(data.get("steps"))
+    start_step = data.get("start_step", 0) if resume_from is not None else len(data["steps"])
     data.update({
-        "data": {},        
+        "data": data["steps"].tree(start_step),
+        "start_step": start_step,
         "scan_start_time": data.get("scan_start_time", datetime.now().isoformat()),
         "motors": motor_names,
         "original_motor_values": original_motor_values,
@@ -51,41 +121,139 @@ def scan(meters, motors, checks=[], *, get_func, put_func, verify_motor=True,
         "delay": delay, 
         "tolerance": tolerance, 
         "sample_size": sample_size,
+        "trigger": trigger,
     })
     scan_logger.info("Starting scan process")
     scan_logger.info(f"Motors: {motor_names}")
     scan_logger.info(f"Motor value combinations: {all_combinations}")
+    estimate = estimate_scan(
+        meters, motors, checks, verify_motor=verify_motor, max_retries=max_retries, delay=delay,
+        sample_size=sample_size, parallel=parallel, repeat=repeat,
+        save_original_motor_values=save_original_motor_values, order=order, slew_rates=slew_rates,
+        delta_motors=delta_motors, min_samples=min_samples, max_samples=max_samples,
+        target_sem=target_sem, target_rel_sem=target_rel_sem, verify_restore=verify_restore,
+        grid=all_combinations,
+    )
+    scan_logger.info(f"Scan estimate: {estimate}")
 
     try:
-        for step_index, combination in enumerate(all_combinations*repeat):
+        if journal:
+            seeded_steps = []
+            if not os.path.isfile(data.get("journal") or ""):
+                data["journal"] = create_journal_path(path, name)
+                seeded_steps = data["steps"]
+            journal_file = open_journal(
+                data["journal"],
+                {k: v for k, v in data.items() if k not in ["steps", "data"]},
+                seeded_steps,
+            )
+
+        done_combinations = count_done_combinations(data["steps"], motor_names) if resume_from is not None else {}
+        if done_combinations:
+            scan_logger.info(f"Resuming scan, {sum(done_combinations.values())} steps already measured")
+
+        if isinstance(monitor, MonitorCache):
+            missing = [read_name for read_name in read_names if read_name not in monitor.index]
+            if missing:
+                raise ValueError(f"Monitor cache does not cover {missing}")
+        elif monitor:
+            subscribe_func = subscribe_func or bulk_method(device_get_func, "subscribe")
+            if subscribe_func is None:
+                raise ValueError("Monitor mode requires subscribe_func or a get_func adapter with subscribe")
+            monitor = monitor_cache = MonitorCache(
+                read_names, subscribe_func, unsubscribe_func or bulk_method(device_get_func, "unsubscribe"),
+            )
+        else:
+            monitor = None
+
+        if step_callback:
+            step_worker = StepCallbackWorker(step_callback)
+
+        if watchdog and check_names:
+            check_watchdog = CheckWatchdog(
+                check_names, check_ranges, get_func, watchdog_period, strict_check, watchdog_action, registry,
+            ).start()
+
+        scan_start = time.monotonic()
+        for step_index, combination in enumerate(all_combinations):
+            if done_combinations.get(combination, 0) > 0:
+                done_combinations[combination] -= 1
+                scan_logger.debug(f"Step {step_index + 1}: combination {combination} already measured, skipping")
+                continue
             scan_logger.info(f"Step {step_index + 1}/{len(all_combinations)}: Setting motor combination: {combination}")
-            set_motors_values(motor_names, combination, get_func, put_func, verify_motor, max_retries, delay, tolerance, parallel)
-            check_data, check_errors = get_meters_data(check_names, get_func, sample_size, delay, parallel, check_ranges, strict_check)
+            if hooks is not None:
+                hooks.emit("on_step_start", step_index=step_index, combination=combination)
+            refresh = not delta_motors or (int(motor_refresh_period) and motor_steps % int(motor_refresh_period) == 0)
+            changed_motors = [
+                (motor_name, motor_value) for motor_name, motor_value in zip(motor_names, combination)
+                if refresh or commanded_motor_values.get(motor_name) != motor_value
+            ]
+            scan_logger.debug(f"Motors to set: {changed_motors}")
+            if check_watchdog is not None:
+                check_watchdog.check()
+            settle_times = set_motors_values(
+                [motor_name for motor_name, _ in changed_motors], [motor_value for _, motor_value in changed_motors],
+                get_func, put_func, verify_motor, max_retries, delay, tolerance, parallel, session,
+                settle, settle_profiles, hooks, check_watchdog,
+            )
+            commanded_motor_values.update(changed_motors)
+            motor_steps += 1
+            stats = sample_meters(
+                read_names, get_func, sample_size, delay, parallel, session, keep_samples, robust_stats,
+                read_ranges, min_samples, max_samples, target_sem, target_rel_sem, monitor,
+                trigger, check_watchdog, hooks,
+            )
+            if check_watchdog is not None:
+                check_watchdog.check()
+                check_snapshot = check_watchdog.snapshot()
+                check_data, check_errors = check_snapshot.pop("check_data"), check_snapshot.pop("check_errors")
+            else:
+                check_snapshot = {}
+                check_data, check_errors = stats.as_dict(stats.mean, check_names), stats.as_dict(stats.std, check_names)
+                check_limits(check_data, check_names, check_ranges, strict_check, registry)
             scan_logger.info(f"Collected data from checks: {check_data}")
-            meter_data, meter_errors = get_meters_data(meter_names, get_func, sample_size, delay, parallel, meter_ranges, strict_check)
+            meter_data, meter_errors = stats.as_dict(stats.mean, meter_names), stats.as_dict(stats.std, meter_names)
             scan_logger.info(f"Collected data from meters: {meter_data}")
+            check_limits(meter_data, meter_names, meter_ranges, strict_check, registry)
 
-            for motor_name, motor_value in zip(motor_names, combination):
-                if motor_name not in data["data"]:
-                    data["data"][motor_name] = {}
-                if motor_value not in data["data"][motor_name]:
-                    data["data"][motor_name][motor_value] = {}
-                data["data"][motor_name][motor_value].update(meter_data)
-
-            if "steps" not in data:
-                data["steps"] = []
+            grid_index, repeat_index = all_combinations.grid_index(step_index)
+            sample_counts = dict(zip(stats.names, stats.count.tolist()))
             step_data = {
                 "step_index": len(data["steps"]) + 1,
+                "grid_index": grid_index,
+                "repeat_index": repeat_index,
                 "motor_values": dict(zip(motor_names, combination)),
+                "settle_times": settle_times,
                 "meter_data": meter_data,
                 "check_data": check_data,
                 "meter_errors": meter_errors,
                 "check_errors": check_errors,
+                "meter_sem": stats.as_dict(stats.sem, meter_names),
+                "meter_min": stats.as_dict(stats.min, meter_names),
+                "meter_max": stats.as_dict(stats.max, meter_names),
+                "meter_counts": {meter_name: sample_counts[meter_name] for meter_name in meter_names},
                 "meter_ranges": {meter_name: meter_range for meter_name, meter_range in zip(meter_names, meter_ranges)},
                 "check_ranges": {check_name: check_range for check_name, check_range in zip(check_names, check_ranges)},
                 "timestamp": datetime.now().isoformat(),
+                **check_snapshot,
             }
+            if robust_stats:
+                step_data["meter_median"] = stats.as_dict(stats.median(), meter_names)
+                step_data["meter_mad"] = stats.as_dict(stats.mad(), meter_names)
+            if trigger is not None:
+                step_data["pulses"] = stats.pulses
+            if keep_samples:
+                step_data["meter_samples"] = stats.sample_arrays(meter_names)
+            if hooks is not None:
+                hooks.emit("on_step_end", step_data=step_data)
             data["steps"].append(step_data)
+            if journal_file is not None:
+                write_journal_record(journal_file, {"type": "step", **step_data})
+            if registry is not None:
+                registry.inc("scaut_scan_steps")
+                registry.set("scaut_scan_steps_per_minute", 60 * motor_steps / (time.monotonic() - scan_start))
+            if step_worker is not None:
+                step_worker.submit(data, step_data["step_index"])
 
     except KeyboardInterrupt as e:
         scan_logger.error("Scan process stopped by user")
@@ -96,6 +264,15 @@ def scan(meters, motors, checks=[], *, get_func, put_func, verify_motor=True,
         raise e
         
     finally:
+
+        if monitor_cache is not None:
+            monitor_cache.close()
+
+        if check_watchdog is not None:
+            check_watchdog.stop()
+
+        if step_worker is not None:
+            step_worker.close()
         
         for call in callback:
             if call is not None:
@@ -105,15 +282,44 @@ def scan(meters, motors, checks=[], *, get_func, put_func, verify_motor=True,
                     
         if save_original_motor_values:
             scan_logger.info("Restoring motors to their original values")
-            set_motors_values(original_motor_values.keys(), original_motor_values.values(), get_func, put_func, verify_motor, max_retries, delay, tolerance, parallel)
+            with tracer.span("restore") if tracer is not None else contextlib.nullcontext():
+                restore_snapshot(
+                    original_motor_values, get_func, put_func, verify_motor and verify_restore, max_retries,
+                    delay, tolerance, parallel, session, settle, settle_profiles,
+                )
                 
         data["scan_end_time"] = datetime.now().isoformat()
-        data["total_steps"] = len(data.get("steps", []))
-        
+        data["total_steps"] = len(data["steps"])
+        data["failed_channels"] = session.breaker.failed()
+        if hooks is not None:
+            hooks.emit("on_scan_end", data=data)
+
+        if registry is not None and registry.running:
+            try:
+                registry.write()
+            except OSError as e:
+                scan_logger.warning(f"Failed to write metrics: {e}")
+
+        if trace and not isinstance(trace, ChromeTracer):
+            trace_name = time.strftime('trace-%Y-%m-%d_%H-%M-%S.json')
+            data["trace"] = tracer.save(trace if isinstance(trace, str) else create_output_path(path, trace_name))
+
         if save:
             path = create_output_path(path, name)
             data["path"] = path
-            save_data(path, data)
+
+        if journal_file is not None:
+            write_journal_record(journal_file, {
+                "type": "footer",
+                **{k: v for k, v in data.items() if k not in ["steps", "data"]},
+            })
+            journal_file.close()
+        
+        if save:
+            if journal_file is not None:
+                compact_journal(data["journal"], path)
+            else:
+                save_data(path, data)
             scan_logger.info(f"Data saved to {path}")
 
         scan_logger.info("Scan process completed")
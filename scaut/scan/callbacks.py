@@ -0,0 +1,47 @@
+import logging
+import threading
+import collections
+
+from ..core import config as cfg
+
+scan_logger = logging.getLogger('Scan')
+
+
+class StepCallbackWorker:
+    def __init__(self, callbacks, maxsize=cfg.SCAN_STEP_CALLBACK_QUEUE):
+        self.callbacks = [call for call in (callbacks if isinstance(callbacks, (list, tuple)) else [callbacks])
+                          if call is not None]
+        self.dropped = 0
+        self._frames = collections.deque(maxlen=int(maxsize))
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="scaut-step-callback", daemon=True)
+        self._thread.start()
+
+    def submit(self, data, step):
+        with self._condition:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append((data, step))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._frames or self._closed)
+                if not self._frames:
+                    return
+                data, step = self._frames.popleft()
+            for call in self.callbacks:
+                try:
+                    call(data)
+                except Exception as e:
+                    scan_logger.exception(f"Step callback {call.__name__} failed on step {step}: {e}")
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self.dropped:
+            scan_logger.info(f"Step callbacks skipped {self.dropped} stale steps")
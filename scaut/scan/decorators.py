@@ -10,10 +10,12 @@ from scipy.optimize import least_squares
 from .utils import scan_logger, truncated_pinv
 from ..core import config as cfg
 from .exceptions import ScanValueError
+from .session import with_snapshot_scope
 
 def response_measurements(targets={}, max_attempts=10, num_singular_values=10, rcond=1e-15, inverse_mode=True, calc_matrix=None):
     def decorator(scan_func):
         @wraps(scan_func)
+        @with_snapshot_scope
         def wrapper(*args, **kwargs):
             scan_logger.info("Calling response_measurements wrapper")
             
@@ -211,6 +213,7 @@ def response_measurements(targets={}, max_attempts=10, num_singular_values=10, r
 def bayesian_optimization(targets={}, n_calls=10, random_state=42, penalty=10, minimize=True):
     def decorator(scan_func):
         @wraps(scan_func)
+        @with_snapshot_scope
         def wrapper(*args, **kwargs):
             scan_logger.info("Launching the Bayesian optimization decorator.")
             
@@ -276,11 +279,7 @@ def bayesian_optimization(targets={}, n_calls=10, random_state=42, penalty=10, m
                     scan_logger.warning(f"Device value outside the allowed range! Add penalty {penalty}")
                     return penalty
                 
-                measured_value = {}
-                for motor, values in scan_result["data"].items():
-                    for val, meter_data in values.items():
-                        for meter in meter_names:
-                            measured_value[meter] = meter_data.get(meter, 0.0)
+                measured_value = scan_result["steps"][-1]["meter_data"]
                 
                 delta = {}
                 for meter in meter_names:
@@ -328,6 +327,7 @@ def bayesian_optimization(targets={}, n_calls=10, random_state=42, penalty=10, m
 def least_squares_fitting(targets={}, penalty=10, method="lm", max_nfev=3, max_steps=3):
     def decorator(scan_func):
         @wraps(scan_func)
+        @with_snapshot_scope
         def wrapper(*args, **kwargs):
             scan_logger.info("Launching the least_squares fitting decorator.")
 
@@ -394,11 +394,7 @@ def least_squares_fitting(targets={}, penalty=10, method="lm", max_nfev=3, max_s
                         residuals.extend([penalty] * len(meter_names))
                         continue
 
-                    measured_value = {}
-                    for motor, values in scan_result["data"].items():
-                        for val, meter_data in values.items():
-                            for meter in meter_names:
-                                measured_value[meter] = meter_data.get(meter, 0.0)
+                    measured_value = scan_result["steps"][-1]["meter_data"]
 
                     for meter in meter_names:
                         residuals.append(measured_value.get(meter, 0.0) - step["meter_data"].get(meter, 0.0))
@@ -450,6 +446,7 @@ def least_squares_fitting(targets={}, penalty=10, method="lm", max_nfev=3, max_s
 def watch_measurements(observation_time=None):
     def decorator(scan_func):
         @wraps(scan_func)
+        @with_snapshot_scope
         def wrapper(*args, **kwargs):
             scan_logger.info("Calling watch_measurements wrapper")
             start = time.time()
@@ -0,0 +1,250 @@
+import time
+import random
+import logging
+import threading
+import collections
+import concurrent.futures
+
+from ..core import config as cfg
+from .exceptions import ScanDeviceError, ScanTimeoutError
+
+scan_logger = logging.getLogger('Scan')
+
+
+def bulk_method(func, name):
+    if func is None:
+        return None
+    return getattr(func, name, None) or getattr(getattr(func, "__self__", None), name, None)
+
+
+class DeviceAdapter:
+    def __init__(self, get_func=None, put_func=None, executor=None):
+        self.get_func = get_func
+        self.put_func = put_func
+        self.executor = executor
+        self._get_many = bulk_method(get_func, "get_many")
+        self._put_many = bulk_method(put_func, "put_many")
+
+    def get(self, name):
+        return self.get_func(name)
+
+    def put(self, name, value):
+        return self.put_func(name, value)
+
+    def get_many(self, names):
+        names = list(names)
+        if self._get_many is not None:
+            return list(self._get_many(names))
+        if self.executor is not None and len(names) > 1:
+            return list(self.executor.map(self.get_func, names))
+        return [self.get_func(name) for name in names]
+
+    def put_many(self, names, values):
+        names, values = list(names), list(values)
+        if self._put_many is not None:
+            self._put_many(names, values)
+        elif self.executor is not None and len(names) > 1:
+            list(self.executor.map(self.put_func, names, values))
+        else:
+            for name, value in zip(names, values):
+                self.put_func(name, value)
+
+
+class EpicsAdapter:
+    def __init__(self, timeout=cfg.SCAN_EPICS_TIMEOUT, connection_timeout=cfg.SCAN_EPICS_CONNECTION_TIMEOUT,
+                 wait=True):
+        import epics
+        self._epics = epics
+        self.timeout = float(timeout)
+        self.connection_timeout = float(connection_timeout)
+        self.wait = wait
+
+    def get(self, name):
+        return self._epics.caget(name, timeout=self.timeout, connection_timeout=self.connection_timeout)
+
+    def put(self, name, value):
+        return self._epics.caput(
+            name, value, wait=self.wait, timeout=self.timeout, connection_timeout=self.connection_timeout,
+        )
+
+    def get_many(self, names):
+        return self._epics.caget_many(
+            list(names), timeout=self.timeout, connection_timeout=self.connection_timeout,
+        )
+
+    def put_many(self, names, values):
+        return self._epics.caput_many(
+            list(names), list(values), wait="all" if self.wait else False,
+            connection_timeout=self.connection_timeout, put_timeout=self.timeout,
+        )
+
+    def subscribe(self, name, callback):
+        return self._epics.PV(
+            name, auto_monitor=True, connection_timeout=self.connection_timeout,
+            callback=lambda value=None, timestamp=None, **kwargs: callback(name, value, timestamp),
+        )
+
+    def unsubscribe(self, pv):
+        pv.clear_callbacks()
+        pv.disconnect()
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=cfg.SCAN_BREAKER_THRESHOLD, reset_time=cfg.SCAN_BREAKER_RESET_TIME):
+        self.threshold = int(threshold)
+        self.reset_time = float(reset_time)
+        self.failures = collections.Counter()
+        self.opened = {}
+        self._lock = threading.Lock()
+
+    def allow(self, name):
+        with self._lock:
+            opened_at = self.opened.get(name)
+        return opened_at is None or time.monotonic() - opened_at >= self.reset_time
+
+    def success(self, name):
+        with self._lock:
+            self.failures.pop(name, None)
+            if self.opened.pop(name, None) is not None:
+                scan_logger.info(f"Channel '{name}' recovered")
+
+    def failure(self, name):
+        with self._lock:
+            self.failures[name] += 1
+            if self.failures[name] >= self.threshold:
+                if name not in self.opened:
+                    scan_logger.warning(f"Channel '{name}' marked as failed after {self.failures[name]} failed calls")
+                self.opened[name] = time.monotonic()
+
+    def failed(self):
+        with self._lock:
+            return list(self.opened)
+
+
+class GuardedDevice:
+    def __init__(self, get_func=None, put_func=None, timeout=cfg.SCAN_IO_TIMEOUT, retries=cfg.SCAN_IO_RETRIES,
+                 breaker=None, executor=None, skip=cfg.SCAN_BREAKER_SKIP, governor=None, tracer=None,
+                 metrics=None):
+        self.get_func = get_func
+        self.put_func = put_func
+        self.timeout = None if timeout is None else float(timeout)
+        self.retries = int(retries)
+        self.breaker = breaker or CircuitBreaker()
+        self.executor = executor
+        self.skip = skip
+        self.governor = governor
+        self.tracer = tracer
+        self.metrics = metrics
+        self._get_many = bulk_method(get_func, "get_many")
+        self._put_many = bulk_method(put_func, "put_many")
+        if self._get_many is not None:
+            self.get_many = self._guarded_get_many
+        if self._put_many is not None:
+            self.put_many = self._guarded_put_many
+
+    def _measured(self, label, names, func):
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter() - start
+                for name in names:
+                    self.metrics.observe_device(label, name, elapsed)
+        return wrapper
+
+    def _run(self, label, names, func, *args, attempt=0):
+        if self.metrics is not None:
+            func = self._measured(label, names, func)
+        if self.tracer is not None:
+            func = self.tracer.traced(
+                func, f"{label} {names[0]}" if len(names) == 1 else f"{label} ({len(names)} channels)",
+                channels=names, attempt=attempt,
+            )
+        release = self.governor.acquire(names, self.timeout) if self.governor is not None else None
+        if self.timeout is None or self.executor is None:
+            try:
+                return func(*args)
+            finally:
+                if release is not None:
+                    release()
+        future = self.executor.submit(func, *args)
+        if release is not None:
+            future.add_done_callback(release)
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            if release is not None:
+                release()
+            raise ScanTimeoutError(f"Device call did not return within {self.timeout} s")
+
+    def _backoff(self, attempt):
+        cap = min(float(cfg.SCAN_IO_MAX_BACKOFF), float(cfg.SCAN_IO_BACKOFF) * 2 ** attempt)
+        time.sleep(random.uniform(0, cap))
+
+    def call(self, label, name, func, *args):
+        if not self.breaker.allow(name):
+            if self.metrics is not None:
+                self.metrics.inc_device("rejected", name)
+            raise ScanDeviceError(f"Channel '{name}' is marked as failed")
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._backoff(attempt - 1)
+                if self.metrics is not None:
+                    self.metrics.inc_device("retries", name)
+            try:
+                result = self._run(label, [name], func, *args, attempt=attempt)
+            except Exception as e:
+                error = e
+                if self.metrics is not None:
+                    self.metrics.inc_device("errors", name, error=type(e).__name__)
+                scan_logger.warning(f"Call to '{name}' failed on attempt {attempt + 1}: {e}")
+            else:
+                self.breaker.success(name)
+                return result
+        self.breaker.failure(name)
+        raise ScanDeviceError(f"Call to '{name}' failed after {self.retries + 1} attempts: {error}") from error
+
+    def get(self, name):
+        if self.skip and not self.breaker.allow(name):
+            if self.metrics is not None:
+                self.metrics.inc_device("skipped", name)
+            return float("nan")
+        return self.call("get", name, self.get_func, name)
+
+    def put(self, name, value):
+        return self.call("put", name, self.put_func, name, value)
+
+    def _guarded_get_many(self, names):
+        names = list(names)
+        values = [None] * len(names)
+        if all(self.breaker.allow(name) for name in names):
+            try:
+                values = list(self._run("get_many", names, self._get_many, names))
+            except Exception as e:
+                scan_logger.warning(f"Bulk read of {names} failed, reading channels one by one: {e}")
+        for i, (name, value) in enumerate(zip(names, values)):
+            if value is None:
+                values[i] = self.get(name)
+            else:
+                self.breaker.success(name)
+        return values
+
+    def _guarded_put_many(self, names, values):
+        names, values = list(names), list(values)
+        if all(self.breaker.allow(name) for name in names):
+            try:
+                self._run("put_many", names, self._put_many, names, values)
+            except Exception as e:
+                scan_logger.warning(f"Bulk write of {names} failed, writing channels one by one: {e}")
+            else:
+                for name in names:
+                    self.breaker.success(name)
+                return
+        for name, value in zip(names, values):
+            self.put(name, value)
+
+
+def as_adapter(get_func=None, put_func=None, executor=None):
+    return DeviceAdapter(get_func, put_func, executor)
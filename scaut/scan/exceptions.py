@@ -5,3 +5,11 @@ class ScanBaseError(Exception):
 class ScanValueError(ScanBaseError, ValueError):
     """Error raised when a device value outside the allowed range."""
 
+
+
+class ScanTimeoutError(ScanBaseError, TimeoutError):
+    """Error raised when a device does not respond in time."""
+
+
+class ScanDeviceError(ScanBaseError):
+    """Error raised when a device call fails or the device is marked as failed."""
@@ -0,0 +1,93 @@
+import time
+import logging
+import threading
+import collections
+
+from ..core import config as cfg
+from .exceptions import ScanTimeoutError
+
+scan_logger = logging.getLogger('Scan')
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(self.rate, 1.0))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                needed = min(tokens, self.burst)
+                if self.tokens >= needed:
+                    self.tokens -= tokens
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class IOLimit:
+    def __init__(self, rate=None, burst=None, max_in_flight=None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.slots = threading.BoundedSemaphore(int(max_in_flight)) if max_in_flight else None
+
+    @property
+    def active(self):
+        return self.bucket is not None or self.slots is not None
+
+    def acquire(self, tokens, timeout=None):
+        if self.slots is not None and not self.slots.acquire(timeout=timeout):
+            raise ScanTimeoutError(f"No I/O slot became free within {timeout} s")
+        if self.bucket is not None:
+            self.bucket.acquire(tokens)
+
+    def release(self):
+        if self.slots is not None:
+            self.slots.release()
+
+
+class IOGovernor:
+    def __init__(self, rate=cfg.SCAN_IO_RATE, burst=cfg.SCAN_IO_BURST, max_in_flight=cfg.SCAN_IO_MAX_IN_FLIGHT,
+                 limits=None):
+        self.total = IOLimit(rate, burst, max_in_flight)
+        self.limits = {
+            prefix: IOLimit(**limit)
+            for prefix, limit in (cfg.SCAN_IO_LIMITS if limits is None else limits).items()
+        }
+
+    @property
+    def active(self):
+        return self.total.active or any(limit.active for limit in self.limits.values())
+
+    def prefix(self, name):
+        return max((prefix for prefix in self.limits if name.startswith(prefix)), key=len, default=None)
+
+    def acquire(self, names, timeout=None):
+        groups = collections.Counter(self.prefix(name) for name in names)
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        acquired = []
+
+        def release(*args):
+            while True:
+                try:
+                    limit = acquired.pop()
+                except IndexError:
+                    return
+                limit.release()
+
+        try:
+            for limit, tokens in [(self.total, len(names))] + [
+                (self.limits[prefix], groups[prefix]) for prefix in sorted(groups, key=str) if prefix is not None
+            ]:
+                if limit.active:
+                    limit.acquire(tokens, None if deadline is None else max(deadline - time.monotonic(), 0.0))
+                    acquired.append(limit)
+        except ScanTimeoutError:
+            release()
+            raise
+        return release
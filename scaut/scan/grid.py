@@ -0,0 +1,183 @@
+import math
+import itertools
+import logging
+from collections.abc import Sequence
+
+import numpy as np
+
+from ..core import config as cfg
+
+scan_logger = logging.getLogger('Scan')
+
+SCAN_ORDERS = ("product", "serpentine", "greedy")
+
+
+class ScanGrid(Sequence):
+    def __init__(self, motor_ranges, repeat=1, order="product", slew_rates=None):
+        if order not in SCAN_ORDERS:
+            raise ValueError(f"Unknown scan order '{order}', expected one of {SCAN_ORDERS}")
+        self.motor_ranges = [list(motor_range) for motor_range in motor_ranges]
+        self.shape = tuple(len(motor_range) for motor_range in self.motor_ranges)
+        self.size = math.prod(self.shape)
+        self.repeat = int(repeat)
+        self.slew_rates = np.array([
+            float(slew_rate) for slew_rate in (slew_rates or [1.0] * len(self.shape))
+        ])
+        self._path = None
+        if order == "greedy" and self.size > int(cfg.SCAN_GREEDY_MAX_POINTS):
+            scan_logger.warning(
+                f"Grid of {self.size} points is too large for greedy ordering "
+                f"(limit {cfg.SCAN_GREEDY_MAX_POINTS}), using serpentine order"
+            )
+            order = "serpentine"
+        self.order = order
+        if order == "greedy":
+            self._path = self._greedy_path()
+
+    def __len__(self):
+        return self.size * self.repeat
+
+    def __iter__(self):
+        if self.order == "product":
+            for _ in range(self.repeat):
+                yield from itertools.product(*self.motor_ranges)
+            return
+        for position in range(len(self)):
+            yield self.combination(self.grid_index(position)[0])
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("ScanGrid index out of range")
+        return self.combination(self.grid_index(position)[0])
+
+    def __repr__(self):
+        return f"ScanGrid(shape={self.shape}, repeat={self.repeat}, order={self.order!r}, steps={len(self)})"
+
+    def grid_index(self, position):
+        counter, repeat_index = position % self.size, position // self.size
+        if self.order == "product":
+            return counter, repeat_index
+        if repeat_index % 2:
+            counter = self.size - 1 - counter
+        if self.order == "greedy":
+            return int(self._path[counter]), repeat_index
+        indices, block = [], self.size
+        for length, index in zip(self.shape, self.indices(counter)):
+            block //= length
+            indices.append(length - 1 - index if (counter // (block * length)) % 2 else index)
+        return self.flat_index(indices), repeat_index
+
+    def flat_index(self, indices):
+        grid_index = 0
+        for length, index in zip(self.shape, indices):
+            grid_index = grid_index * length + index
+        return grid_index
+
+    def indices(self, grid_index):
+        indices = []
+        for length in reversed(self.shape):
+            grid_index, index = divmod(grid_index, length)
+            indices.append(index)
+        return tuple(reversed(indices))
+
+    def combination(self, grid_index):
+        return tuple(
+            motor_range[index]
+            for motor_range, index in zip(self.motor_ranges, self.indices(grid_index))
+        )
+
+    def _points(self, grid_indices):
+        grid_indices = np.asarray(grid_indices)
+        points = np.empty((len(grid_indices), len(self.shape)))
+        block = self.size
+        for k, motor_range in enumerate(self.motor_ranges):
+            block //= len(motor_range)
+            points[:, k] = np.asarray(motor_range, dtype=float)[(grid_indices // block) % len(motor_range)]
+        return points
+
+    def _greedy_path(self):
+        points = self._points(np.arange(self.size)) / self.slew_rates
+        path = np.empty(self.size, dtype=np.int64)
+        visited = np.zeros(self.size, dtype=bool)
+        current = 0
+        for i in range(self.size):
+            path[i], visited[current] = current, True
+            if i + 1 < self.size:
+                cost = np.abs(points - points[current]).max(axis=1)
+                cost[visited] = np.inf
+                current = int(np.argmin(cost))
+        return path
+
+    def _walk_points(self):
+        return self._points([self.grid_index(position)[0] for position in range(len(self))])
+
+    def travel_time(self):
+        if not self.shape or len(self) < 2:
+            return 0.0
+        points = self._walk_points() / self.slew_rates
+        return float(np.abs(np.diff(points, axis=0)).max(axis=1).sum())
+
+    def moves(self):
+        if not self.shape or not len(self):
+            return 0, 0
+        points = self._walk_points()
+        changed = np.vstack([np.ones((1, len(self.shape)), dtype=bool), np.diff(points, axis=0) != 0])
+        return int(changed.sum()), int(changed.any(axis=1).sum())
+
+
+def estimate_scan(meters, motors, checks=[], *, verify_motor=True, max_retries=cfg.SCAN_MAX_TRIES,
+                  delay=cfg.SCAN_DELAY, sample_size=cfg.SCAN_SAMPLE_SIZE, parallel=cfg.SCAN_PARALLEL,
+                  repeat=cfg.SCAN_REPEAT, save_original_motor_values=True, order="product",
+                  slew_rates=None, delta_motors=cfg.SCAN_DELTA_MOTORS, min_samples=cfg.SCAN_MIN_SAMPLES,
+                  max_samples=None, target_sem=None, target_rel_sem=None, verify_restore=cfg.SCAN_VERIFY_RESTORE,
+                  grid=None, **kwargs):
+    n_motors, n_meters, n_checks = len(motors), len(meters), len(checks)
+    delay, sample_size, max_retries = float(delay), int(sample_size), int(max_retries)
+    if grid is None:
+        grid = ScanGrid(
+            [motor[1] for motor in motors], repeat, order,
+            slew_rates and [slew_rates.get(motor[0], 1.0) for motor in motors],
+        )
+    steps = len(grid)
+    exact = steps <= int(cfg.SCAN_ESTIMATE_MAX_STEPS)
+    if delta_motors and exact:
+        puts, move_steps = grid.moves()
+    else:
+        puts, move_steps = steps * n_motors, steps * bool(n_motors)
+
+    def motors_time(n_puts, n_move_steps, retries):
+        if not verify_motor:
+            return 0.0
+        return delay * retries * n_move_steps
+
+    adaptive = target_sem is not None or target_rel_sem is not None
+    samples = (int(min_samples), int(max_samples or sample_size)) if adaptive else (sample_size, sample_size)
+
+    def read_time(n_devices, n_samples=sample_size):
+        if not n_devices:
+            return 0.0
+        return (n_samples - 1) * delay
+
+    n_read = len({device[0] for device in [*checks, *meters]})
+    setup_time = read_time(n_motors, 1) if save_original_motor_values else 0.0
+    restore_puts = (n_motors, bool(n_motors)) if save_original_motor_values and verify_restore else (0, 0)
+    min_time = (setup_time + steps * read_time(n_read, samples[0])
+                + motors_time(puts, move_steps, 1) + motors_time(*restore_puts, 1))
+    max_time = (setup_time + steps * read_time(n_read, samples[1])
+                + motors_time(puts, move_steps, max_retries) + motors_time(*restore_puts, max_retries))
+
+    return {
+        "steps": steps,
+        "motors": n_motors,
+        "meters": n_meters,
+        "checks": n_checks,
+        "puts": puts,
+        "reads": steps * samples[1] * n_read + puts * bool(verify_motor),
+        "min_time": min_time,
+        "max_time": max_time,
+        "travel_time": grid.travel_time() if exact else None,
+    }
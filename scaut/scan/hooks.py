@@ -0,0 +1,90 @@
+import time
+import logging
+from collections.abc import Mapping
+
+import numpy as np
+
+scan_logger = logging.getLogger('Scan')
+
+HOOK_EVENTS = ("on_step_start", "on_put", "on_settled", "on_sample", "on_step_end", "on_scan_end")
+
+
+class ScanHooks:
+    def __init__(self, hooks=()):
+        self.hooks = {event: [] for event in HOOK_EVENTS}
+        for hook in hooks:
+            self.register(hook)
+
+    def register(self, hook):
+        if isinstance(hook, ScanHooks):
+            for event, funcs in hook.hooks.items():
+                self.hooks[event].extend(funcs)
+            return
+        for event in HOOK_EVENTS:
+            func = hook.get(event) if isinstance(hook, Mapping) else getattr(hook, event, None)
+            if func is not None:
+                self.hooks[event].append(func)
+
+    def __bool__(self):
+        return any(self.hooks.values())
+
+    def emit(self, event, **kwargs):
+        for func in self.hooks[event]:
+            func(**kwargs)
+
+
+def as_hooks(hooks=None, timing=False, tracer=None):
+    if isinstance(hooks, ScanHooks) and not timing and tracer is None:
+        return hooks or None
+    if isinstance(hooks, (ScanHooks, Mapping)) or any(hasattr(hooks, event) for event in HOOK_EVENTS):
+        hooks = [hooks]
+    hooks = list(hooks or []) + ([TimingCollector()] if timing else []) + ([tracer] if tracer is not None else [])
+    return ScanHooks(hooks) or None
+
+
+class TimingCollector:
+    PHASES = ("put", "settle", "wait", "read")
+
+    def __init__(self):
+        self.timings = []
+        self._current = None
+        self._start = None
+
+    def on_step_start(self, **kwargs):
+        self._current = dict.fromkeys(self.PHASES, 0.0)
+        self._start = time.monotonic()
+
+    def on_put(self, duration, **kwargs):
+        if self._current is not None:
+            self._current["put"] += duration
+
+    def on_settled(self, duration, **kwargs):
+        if self._current is not None:
+            self._current["settle"] += duration
+
+    def on_sample(self, wait, duration, **kwargs):
+        if self._current is not None:
+            self._current["wait"] += wait
+            self._current["read"] += duration
+
+    def on_step_end(self, step_data, **kwargs):
+        timings, self._current = self._current, None
+        timings["step"] = time.monotonic() - self._start
+        timings["other"] = timings["step"] - sum(timings[phase] for phase in self.PHASES)
+        step_data["timings"] = timings
+        self.timings.append(timings)
+
+    def summary(self):
+        summary = {}
+        for phase in (*self.PHASES, "other", "step"):
+            values = np.array([timings[phase] for timings in self.timings])
+            summary[phase] = {
+                "total": float(values.sum()),
+                "mean": float(values.mean()) if len(values) else 0.0,
+                "max": float(values.max(initial=0.0)),
+            }
+        return summary
+
+    def on_scan_end(self, data, **kwargs):
+        data["timing_summary"] = self.summary()
+        scan_logger.info(f"Scan timing summary: {data['timing_summary']}")
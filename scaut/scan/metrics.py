@@ -0,0 +1,163 @@
+import os
+import math
+import logging
+import threading
+
+import numpy as np
+
+from ..core import config as cfg
+
+scan_logger = logging.getLogger('Scan')
+
+
+def ioc_prefix(name, prefixes=()):
+    prefix = max((prefix for prefix in prefixes if name.startswith(prefix)), key=len, default=None)
+    if prefix is not None:
+        return prefix
+    return name[:name.index(":") + 1] if ":" in name else name
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels, **extra):
+    labels = {**dict(labels), **extra}
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+class LatencyHistogram:
+    MIN_VALUE = 1e-6
+    SUB_BUCKETS = 16
+    OCTAVES = 28
+
+    def __init__(self, bounds=()):
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.bound_counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.counts = np.zeros(self.SUB_BUCKETS * self.OCTAVES, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+
+    def bucket(self, value):
+        if value <= self.MIN_VALUE:
+            return 0
+        return min(int(math.log2(value / self.MIN_VALUE) * self.SUB_BUCKETS), len(self.counts) - 1)
+
+    def upper_bounds(self):
+        return self.MIN_VALUE * 2 ** (np.arange(1, len(self.counts) + 1) / self.SUB_BUCKETS)
+
+    def record(self, value):
+        self.counts[self.bucket(value)] += 1
+        self.bound_counts[np.searchsorted(self.bounds, value, side="left")] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        return np.cumsum(self.bound_counts[:-1]).tolist()
+
+    def quantile(self, q):
+        if not self.count:
+            return float("nan")
+        index = int(np.searchsorted(np.cumsum(self.counts), q * self.count))
+        return float(self.upper_bounds()[min(index, len(self.counts) - 1)])
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=cfg.SCAN_METRICS_BUCKETS, prefixes=None):
+        self.buckets = sorted(float(bucket) for bucket in buckets)
+        self.prefixes = list(cfg.SCAN_IO_LIMITS) + list(cfg.SCAN_METRICS_PREFIXES) if prefixes is None else prefixes
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.filename = cfg.SCAN_METRICS_FILE
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram(self.buckets)
+            histogram.record(value)
+
+    def observe_device(self, op, device, seconds):
+        self.observe("scaut_device_latency_seconds", seconds, op=op, device=device)
+        self.observe("scaut_prefix_latency_seconds", seconds, op=op, prefix=ioc_prefix(device, self.prefixes))
+
+    def inc_device(self, name, device, value=1, **labels):
+        self.inc(f"scaut_device_{name}", value, device=device, **labels)
+        self.inc(f"scaut_prefix_{name}", value, prefix=ioc_prefix(device, self.prefixes), **labels)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted({name for name, _ in metrics}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (metric_name, labels), value in metrics.items():
+                        if metric_name == name:
+                            suffix = "_total" if kind == "counter" else ""
+                            lines.append(f"{name}{suffix}{format_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric_name, labels), histogram in self.histograms.items():
+                    if metric_name != name:
+                        continue
+                    for bound, count in zip(histogram.bounds.tolist(), histogram.cumulative()):
+                        lines.append(f"{name}_bucket{format_labels(labels, le=bound)} {count}")
+                    lines.append(f"{name}_bucket{format_labels(labels, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def write(self, metrics_filename=None):
+        metrics_filename = metrics_filename or self.filename
+        tmp_filename = f"{metrics_filename}.tmp"
+        with open(tmp_filename, "w", newline="", encoding="utf-8") as f_out:
+            f_out.write(self.render())
+        os.replace(tmp_filename, metrics_filename)
+        return metrics_filename
+
+    def start(self, metrics_filename=None, period=cfg.SCAN_METRICS_PERIOD):
+        if self._thread is not None:
+            return self
+        self.filename = metrics_filename = metrics_filename or self.filename
+
+        def run():
+            while not self._stop.wait(float(period)):
+                try:
+                    self.write(metrics_filename)
+                except OSError as e:
+                    scan_logger.warning(f"Failed to write metrics to {metrics_filename}: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="scaut-metrics", daemon=True)
+        self._thread.start()
+        scan_logger.info(f"Writing metrics to {metrics_filename} every {period} s")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+default_registry = MetricsRegistry()
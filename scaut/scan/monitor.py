@@ -0,0 +1,111 @@
+import time
+import logging
+import threading
+
+import numpy as np
+
+from ..core import config as cfg
+from .exceptions import ScanTimeoutError
+
+scan_logger = logging.getLogger('Scan')
+
+
+class MonitorCache:
+    def __init__(self, names, subscribe_func, unsubscribe_func=None):
+        self.names = list(dict.fromkeys(names))
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.values = np.full(len(self.names), np.nan)
+        self.timestamps = np.zeros(len(self.names))
+        self.counters = np.zeros(len(self.names), dtype=np.int64)
+        self._condition = threading.Condition()
+        self._unsubscribe_func = unsubscribe_func
+        self._handles = [subscribe_func(name, self.update) for name in self.names]
+        scan_logger.info(f"Monitoring {len(self.names)} channels")
+
+    def update(self, name, value, timestamp=None):
+        with self._condition:
+            i = self.index[name]
+            self.values[i] = value
+            self.timestamps[i] = timestamp if timestamp is not None else time.time()
+            self.counters[i] += 1
+            self._condition.notify_all()
+
+    def get(self, name):
+        with self._condition:
+            return self.values[self.index[name]].item()
+
+    def get_many(self, names):
+        with self._condition:
+            return self.values[[self.index[name] for name in names]].tolist()
+
+    def snapshot(self, names):
+        with self._condition:
+            return self.counters[[self.index[name] for name in names]].copy()
+
+    def wait_updates(self, names, since, timeout=cfg.SCAN_MONITOR_TIMEOUT):
+        index = [self.index[name] for name in names]
+        with self._condition:
+            ready = self._condition.wait_for(lambda: (self.counters[index] > since).all(), timeout=float(timeout))
+            if not ready:
+                stale = [name for name, counter, last in zip(names, self.counters[index], since) if counter <= last]
+                raise ScanTimeoutError(f"No monitor update from {stale} within {timeout} s")
+            return self.counters[index].copy()
+
+    def close(self):
+        if self._unsubscribe_func is not None:
+            for handle in self._handles:
+                self._unsubscribe_func(handle)
+        self._handles = []
+        scan_logger.info("Monitoring stopped")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FakePublisher:
+    def __init__(self, source=None):
+        self.source = source
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, name, callback):
+        with self._lock:
+            self._subscribers.setdefault(name, []).append(callback)
+        return name, callback
+
+    def unsubscribe(self, handle):
+        name, callback = handle
+        with self._lock:
+            self._subscribers.get(name, []).remove(callback)
+
+    def publish(self, name, value, timestamp=None):
+        with self._lock:
+            callbacks = list(self._subscribers.get(name, []))
+        for callback in callbacks:
+            callback(name, value, timestamp)
+
+    def publish_all(self):
+        with self._lock:
+            names = list(self._subscribers)
+        for name in names:
+            self.publish(name, self.source(name))
+
+    def start(self, rate):
+        def run():
+            while not self._stop.wait(1 / rate):
+                self.publish_all()
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="scaut-fake-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,391 @@
+from collections.abc import Mapping, Sequence
+from numbers import Integral, Real
+
+import numpy as np
+
+from ..core import config as cfg
+
+
+def _is_numeric_mapping(value):
+    return isinstance(value, dict) and all(
+        isinstance(x, Real) and not isinstance(x, (bool, np.bool_)) for x in value.values()
+    )
+
+
+def _is_integer_mapping(value):
+    return all(isinstance(x, Integral) and not isinstance(x, (bool, np.bool_)) for x in value.values())
+
+
+def _is_number(value):
+    return isinstance(value, Real) and not isinstance(value, (bool, np.bool_))
+
+
+def _equal(a, b):
+    try:
+        return bool(a == b)
+    except ValueError:
+        return False
+
+
+class _Table:
+    def __init__(self, capacity, dtype=np.float64):
+        self.names = []
+        self.columns = {}
+        self.fill = 0 if np.issubdtype(dtype, np.integer) else np.nan
+        self.values = np.full((capacity, int(cfg.SCAN_RESULT_COLUMNS)), self.fill, dtype=dtype)
+        self.mask = np.zeros((capacity, int(cfg.SCAN_RESULT_COLUMNS)), dtype=bool)
+        self.present = np.zeros(capacity, dtype=bool)
+
+    def grow_rows(self, capacity):
+        n_rows, n_cols = self.values.shape
+        values = np.full((capacity, n_cols), self.fill, dtype=self.values.dtype)
+        values[:n_rows] = self.values
+        mask = np.zeros((capacity, n_cols), dtype=bool)
+        mask[:n_rows] = self.mask
+        present = np.zeros(capacity, dtype=bool)
+        present[:n_rows] = self.present
+        self.values, self.mask, self.present = values, mask, present
+
+    def promote(self, dtype=np.float64):
+        values = self.values.astype(dtype)
+        values[~self.mask] = np.nan
+        self.values, self.fill = values, np.nan
+
+    def column(self, name):
+        col = self.columns.get(name)
+        if col is None:
+            col = len(self.names)
+            n_rows, n_cols = self.values.shape
+            if col >= n_cols:
+                values = np.full((n_rows, 2 * n_cols), self.fill, dtype=self.values.dtype)
+                values[:, :n_cols] = self.values
+                mask = np.zeros((n_rows, 2 * n_cols), dtype=bool)
+                mask[:, :n_cols] = self.mask
+                self.values, self.mask = values, mask
+            self.columns[name] = col
+            self.names.append(name)
+        return col
+
+    def set_row(self, row, mapping):
+        self.present[row] = True
+        for name, value in mapping.items():
+            col = self.column(name)
+            self.values[row, col] = value
+            self.mask[row, col] = True
+
+    def row(self, row):
+        cols = np.flatnonzero(self.mask[row, :len(self.names)])
+        values = self.values[row, cols].tolist()
+        return {self.names[col]: value for col, value in zip(cols, values)}
+
+
+class _Scalar:
+    def __init__(self, capacity, dtype):
+        self.values = np.zeros(capacity, dtype=dtype)
+        self.present = np.zeros(capacity, dtype=bool)
+
+    def grow_rows(self, capacity):
+        n_rows = len(self.values)
+        values = np.zeros(capacity, dtype=self.values.dtype)
+        values[:n_rows] = self.values
+        present = np.zeros(capacity, dtype=bool)
+        present[:n_rows] = self.present
+        self.values, self.present = values, present
+
+    def promote(self, dtype=np.float64):
+        self.values = self.values.astype(dtype)
+
+    def set_row(self, row, value):
+        self.values[row] = value
+        self.present[row] = True
+
+    def row(self, row):
+        return self.values[row].item()
+
+
+class ScanResult(Sequence):
+    def __init__(self, steps=(), capacity=cfg.SCAN_RESULT_CAPACITY):
+        self._size = 0
+        self._capacity = max(int(capacity), 1)
+        self._keys = {"step_index": None}
+        self._tables = {}
+        self._extras = []
+        self._extra_rows = {}
+        self._last_extras = {}
+        self._rows = {}
+        self._setpoints = {}
+        self.step_index = np.zeros(self._capacity, dtype=np.int64)
+        self.timestamps = []
+        for step in steps:
+            self.append(step)
+
+    def _grow(self):
+        self._capacity *= 2
+        step_index = np.zeros(self._capacity, dtype=np.int64)
+        step_index[:self._size] = self.step_index[:self._size]
+        self.step_index = step_index
+        for table in self._tables.values():
+            table.grow_rows(self._capacity)
+
+    def append(self, step):
+        if isinstance(step, ScanStep):
+            step = step.to_dict()
+        if self._size == self._capacity:
+            self._grow()
+        row = self._size
+        extras = {}
+        for key, value in step.items():
+            if key == "step_index":
+                continue
+            self._keys.setdefault(key)
+            if key == "timestamp":
+                continue
+            table = self._table(key, value)
+            if table is not None:
+                table.set_row(row, value)
+            else:
+                last = self._last_extras.get(key)
+                if type(last) is type(value) and isinstance(value, (dict, list)) and _equal(last, value):
+                    value = last
+                self._last_extras[key] = extras[key] = value
+                self._extra_rows.setdefault(key, []).append(row)
+        step_index = step.get("step_index", row + 1)
+        self.step_index[row] = step_index
+        self.timestamps.append(step.get("timestamp"))
+        self._extras.append(extras or None)
+        self._rows[step_index] = row
+        for motor_name, motor_value in step.get("motor_values", {}).items():
+            self._setpoints.setdefault(motor_name, {}).setdefault(motor_value, []).append(row)
+        self._size += 1
+
+    def _table(self, key, value):
+        if isinstance(value, (bool, np.bool_)):
+            return None
+        if isinstance(value, Integral):
+            kind, args = _Scalar, (np.int64,)
+        elif isinstance(value, Real):
+            kind, args = _Scalar, (np.float64,)
+        elif _is_numeric_mapping(value):
+            kind, args = _Table, (np.int64 if value and _is_integer_mapping(value) else np.float64,)
+        else:
+            return None
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = kind(self._capacity, *args)
+        elif not isinstance(table, kind):
+            return None
+        elif table.values.dtype != args[0] and args[0] == np.float64:
+            table.promote()
+        return table
+
+    def _extra_value(self, row, key, name=None):
+        value = self._extras[row][key]
+        if name is not None:
+            value = value.get(name) if isinstance(value, Mapping) else None
+        return float(value) if _is_number(value) else None
+
+    def extend(self, steps):
+        for step in steps:
+            self.append(step)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ScanStep(self, row) for row in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ScanResult index out of range")
+        return ScanStep(self, index)
+
+    def copy(self):
+        return list(self)
+
+    def to_list(self):
+        return [step.to_dict() for step in self]
+
+    def find(self, step_index):
+        row = self._rows.get(step_index)
+        return None if row is None else ScanStep(self, row)
+
+    def rows_at(self, motor_name, motor_value, start=0):
+        rows = self._setpoints.get(motor_name, {}).get(motor_value, [])
+        return [row for row in rows if row >= start]
+
+    def lookup(self, motor_name, motor_value):
+        rows = self._setpoints.get(motor_name, {}).get(motor_value)
+        return ScanStep(self, rows[-1]) if rows else None
+
+    def names(self, key):
+        table = self._tables.get(key)
+        names = list(table.names) if isinstance(table, _Table) else []
+        for row in self._extra_rows.get(key, []):
+            value = self._extras[row][key]
+            if isinstance(value, Mapping):
+                names.extend(name for name in value if name not in names)
+        return names
+
+    def column(self, key, name=None):
+        table = self._tables.get(key)
+        if isinstance(table, _Scalar):
+            out = table.values[:self._size]
+        elif table is None or name not in table.columns:
+            out = np.full(self._size, np.nan)
+        else:
+            out = table.values[:self._size, table.columns[name]]
+        extra_rows = self._extra_rows.get(key)
+        if extra_rows:
+            out = out.astype(float)
+            for row in extra_rows:
+                value = self._extra_value(row, key, name)
+                out[row] = np.nan if value is None else value
+        return out
+
+    def matrix(self, key, names=None, rows=None, fill=np.nan):
+        names = self.names(key) if names is None else list(names)
+        rows = np.arange(self._size) if rows is None else np.asarray(rows, dtype=int)
+        out = np.full((len(rows), len(names)), fill, dtype=float)
+        table = self._tables.get(key)
+        if isinstance(table, _Table):
+            for j, name in enumerate(names):
+                col = table.columns.get(name)
+                if col is not None:
+                    mask = table.mask[rows, col]
+                    out[mask, j] = table.values[rows[mask], col]
+        extra_rows = set(self._extra_rows.get(key, []))
+        for i, row in enumerate(rows.tolist()):
+            if row in extra_rows:
+                for j, name in enumerate(names):
+                    value = self._extra_value(row, key, name)
+                    if value is not None:
+                        out[i, j] = value
+        return out
+
+    def select(self, step_range=None, last=cfg.SCAN_SHOW_LAST_STEP_NUMBERS):
+        if step_range is None:
+            return np.arange(max(self._size - int(last), 0), self._size)
+        min_index, max_index, step_size = step_range
+        step_index = self.step_index[:self._size]
+        return np.flatnonzero((step_index >= min_index) & (step_index <= max_index))[::step_size]
+
+    def tree(self, start=0):
+        return ScanTree(self, start)
+
+
+class ScanStep(Mapping):
+    def __init__(self, result, row):
+        self._result = result
+        self._row = row
+
+    def __getitem__(self, key):
+        result, row = self._result, self._row
+        if key == "step_index":
+            return int(result.step_index[row])
+        if key == "timestamp" and key in result._keys:
+            return result.timestamps[row]
+        extras = result._extras[row]
+        if extras is not None and key in extras:
+            return extras[key]
+        table = result._tables.get(key)
+        if table is not None and table.present[row]:
+            return table.row(row)
+        raise KeyError(key)
+
+    def _has(self, key):
+        result, row = self._result, self._row
+        if key in ("step_index", "timestamp"):
+            return True
+        extras = result._extras[row]
+        if extras is not None and key in extras:
+            return True
+        table = result._tables.get(key)
+        return table is not None and bool(table.present[row])
+
+    def __iter__(self):
+        return (key for key in self._result._keys if self._has(key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return key in self._result._keys and self._has(key)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        return {key: self[key] for key in self}
+
+
+class ScanTree(Mapping):
+    def __init__(self, result, start=0):
+        self._result = result
+        self._start = start
+
+    def __getitem__(self, motor_name):
+        setpoints = self._result._setpoints.get(motor_name, {})
+        if not any(rows[-1] >= self._start for rows in setpoints.values()):
+            raise KeyError(motor_name)
+        return _SetpointTree(self._result, motor_name, self._start)
+
+    def __iter__(self):
+        return (
+            motor_name for motor_name, setpoints in self._result._setpoints.items()
+            if any(rows[-1] >= self._start for rows in setpoints.values())
+        )
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr({motor_name: dict(values) for motor_name, values in self.items()})
+
+
+class _SetpointTree(Mapping):
+    def __init__(self, result, motor_name, start=0):
+        self._result = result
+        self._motor_name = motor_name
+        self._start = start
+
+    def __getitem__(self, motor_value):
+        rows = self._result.rows_at(self._motor_name, motor_value, self._start)
+        if not rows:
+            raise KeyError(motor_value)
+        table = self._result._tables.get("meter_data")
+        meter_data = {}
+        if table is None:
+            return meter_data
+        for row in reversed(rows):
+            for name, value in table.row(row).items():
+                meter_data.setdefault(name, value)
+            if len(meter_data) == len(table.names):
+                break
+        return {name: meter_data[name] for name in table.names if name in meter_data}
+
+    def __iter__(self):
+        setpoints = self._result._setpoints.get(self._motor_name, {})
+        return (value for value, rows in setpoints.items() if rows[-1] >= self._start)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def as_scan_result(steps):
+    return steps if isinstance(steps, ScanResult) else ScanResult(steps or [])
+
+
+def json_default(obj):
+    if isinstance(obj, ScanResult):
+        return obj.to_list()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,109 @@
+import logging
+import threading
+import contextlib
+import concurrent.futures
+from functools import wraps
+
+from ..core import config as cfg
+from .devices import CircuitBreaker
+from .governor import IOGovernor
+
+scan_logger = logging.getLogger('Scan')
+
+
+class DeviceSession:
+    def __init__(self, max_workers=cfg.SCAN_MAX_WORKERS, initializer=None, initargs=(), breaker=None,
+                 governor=None):
+        self.max_workers = int(max_workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.breaker = breaker or CircuitBreaker()
+        self.governor = governor or IOGovernor()
+        self.snapshot = None
+        self._executor = None
+        self._call_executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="scaut-io",
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+                scan_logger.info(f"Device session started with {self.max_workers} workers")
+            return self._executor
+
+    @property
+    def call_executor(self):
+        with self._lock:
+            if self._call_executor is None:
+                self._call_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="scaut-call",
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            return self._call_executor
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn, *iterables):
+        return list(self.executor.map(fn, *iterables))
+
+    @contextlib.contextmanager
+    def snapshot_scope(self):
+        if self.snapshot is not None:
+            yield self.snapshot
+            return
+        self.snapshot = {}
+        try:
+            yield self.snapshot
+        finally:
+            self.snapshot = None
+
+    def close(self):
+        self.snapshot = None
+        with self._lock:
+            executor, self._executor = self._executor, None
+            call_executor, self._call_executor = self._call_executor, None
+        if call_executor is not None:
+            call_executor.shutdown(wait=False, cancel_futures=True)
+        if executor is not None:
+            executor.shutdown(wait=True)
+            scan_logger.info("Device session closed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def session_executor(session=None):
+    if session is not None:
+        return contextlib.nullcontext(session.executor)
+    return concurrent.futures.ThreadPoolExecutor(max_workers=int(cfg.SCAN_MAX_WORKERS))
+
+
+def with_session(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if kwargs.get("session") is not None:
+            return func(*args, **kwargs)
+        with DeviceSession() as session:
+            return func(*args, **{**kwargs, "session": session})
+    return wrapper
+
+
+def with_snapshot_scope(func):
+    @wraps(func)
+    @with_session
+    def wrapper(*args, **kwargs):
+        with kwargs["session"].snapshot_scope():
+            return func(*args, **kwargs)
+    return wrapper
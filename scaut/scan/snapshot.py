@@ -0,0 +1,56 @@
+import os
+import json
+import time
+import logging
+import contextlib
+from datetime import datetime
+
+from ..core import config as cfg
+from .session import session_executor
+from .utils import create_output_path, read_meters, write_motors, set_motors_values
+
+scan_logger = logging.getLogger('Scan')
+
+
+def take_snapshot(names, get_func, parallel=False, session=None):
+    names = list(dict.fromkeys(names))
+    cached = {} if session is None or session.snapshot is None else session.snapshot
+    missing = [name for name in names if name not in cached]
+    if missing:
+        with session_executor(session) if parallel else contextlib.nullcontext() as executor:
+            cached.update(zip(missing, read_meters(missing, get_func, executor)))
+        scan_logger.info(f"Snapshot taken for {missing}")
+    return {name: cached[name] for name in names}
+
+
+def save_snapshot(snapshot, name=None, path=cfg.SNAPSHOT_DIR):
+    name = name or time.strftime('snapshot-%Y-%m-%d_%H-%M-%S')
+    snapshot_filename = create_output_path(path, name if name.endswith(".json") else f"{name}.json")
+    with open(snapshot_filename, "w", newline="", encoding="utf-8") as f_out:
+        json.dump({"name": name, "timestamp": datetime.now().isoformat(), "values": snapshot}, f_out)
+    scan_logger.info(f"Snapshot saved to file: {snapshot_filename}")
+    return snapshot_filename
+
+
+def load_snapshot(snapshot_filename, path=cfg.SNAPSHOT_DIR):
+    if not os.path.isfile(snapshot_filename):
+        name = snapshot_filename if snapshot_filename.endswith(".json") else f"{snapshot_filename}.json"
+        snapshot_filename = os.path.join(path, name)
+    with open(snapshot_filename, "r", encoding="utf-8") as f_in:
+        return json.load(f_in)["values"]
+
+
+def restore_snapshot(snapshot, get_func, put_func, verify=cfg.SCAN_VERIFY_RESTORE, max_retries=cfg.SCAN_MAX_TRIES,
+                     delay=cfg.SCAN_DELAY, tolerance=cfg.SCAN_TOLERANCE, parallel=False, session=None, settle=False,
+                     settle_profiles=None):
+    if isinstance(snapshot, str):
+        snapshot = load_snapshot(snapshot)
+    if verify:
+        set_motors_values(
+            snapshot.keys(), snapshot.values(), get_func, put_func, True, max_retries, delay, tolerance,
+            parallel, session, settle, settle_profiles,
+        )
+    else:
+        with session_executor(session) if parallel else contextlib.nullcontext() as executor:
+            write_motors(list(snapshot), list(snapshot.values()), put_func, executor)
+    scan_logger.info(f"Snapshot restored for {list(snapshot)}")
@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class SampleStats:
+    def __init__(self, names, capacity=0, keep_samples=False):
+        n = len(names)
+        self.names = list(names)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self._m2 = np.zeros(n)
+        self.samples = np.full((int(capacity), n), np.nan) if keep_samples else None
+        self.pulses = []
+
+    def update(self, values, mask=None):
+        values = np.asarray(values, dtype=float)
+        index = np.arange(len(self.names)) if mask is None else np.flatnonzero(mask)
+        if self.samples is not None:
+            rows = self.count[index]
+            if len(rows) and rows.max() >= len(self.samples):
+                self._grow(2 * max(len(self.samples), 1))
+            self.samples[rows, index] = values
+        self.count[index] += 1
+        delta = values - self.mean[index]
+        self.mean[index] += delta / self.count[index]
+        self._m2[index] += delta * (values - self.mean[index])
+        np.minimum.at(self.min, index, values)
+        np.maximum.at(self.max, index, values)
+
+    def _grow(self, capacity):
+        samples = np.full((capacity, len(self.names)), np.nan)
+        samples[:len(self.samples)] = self.samples
+        self.samples = samples
+
+    @property
+    def std(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self._m2 / self.count)
+
+    @property
+    def sem(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self._m2 / (self.count - 1) / self.count)
+
+    def median(self):
+        if self.samples is None:
+            return np.full(len(self.names), np.nan)
+        return np.nanmedian(self.samples[:self.count.max(initial=0)], axis=0)
+
+    def mad(self):
+        if self.samples is None:
+            return np.full(len(self.names), np.nan)
+        samples = self.samples[:self.count.max(initial=0)]
+        return np.nanmedian(np.abs(samples - np.nanmedian(samples, axis=0)), axis=0)
+
+    def as_dict(self, values, names=None):
+        data = dict(zip(self.names, np.asarray(values, dtype=float).tolist()))
+        return data if names is None else {name: data[name] for name in names}
+
+    def sample_arrays(self, names=None):
+        if self.samples is None:
+            return {}
+        columns = {name: i for i, name in enumerate(self.names)}
+        return {
+            name: self.samples[:self.count[columns[name]], columns[name]]
+            for name in (self.names if names is None else names)
+        }
@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextlib
+from functools import wraps
+
+scan_logger = logging.getLogger('Scan')
+
+
+class ChromeTracer:
+    def __init__(self):
+        self.events = []
+        self.threads = {}
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._step_start = None
+
+    def complete(self, name, start, end, cat="scan", **args):
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self.pid,
+            "tid": thread.ident,
+            "args": args,
+        }
+        with self._lock:
+            self.threads.setdefault(thread.ident, thread.name)
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, cat="scan", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, start, time.perf_counter(), cat, **args)
+
+    def traced(self, func, name, cat="io", **args):
+        @wraps(func)
+        def wrapper(*func_args):
+            with self.span(name, cat, **args):
+                return func(*func_args)
+        return wrapper
+
+    def on_step_start(self, step_index, combination, **kwargs):
+        self._step_start = time.perf_counter()
+
+    def on_put(self, names, attempt, duration, **kwargs):
+        end = time.perf_counter()
+        self.complete("put", end - duration, end, channels=names, attempt=attempt)
+
+    def on_settled(self, names, pending, attempt, duration, **kwargs):
+        end = time.perf_counter()
+        self.complete("settle", end - duration, end, settled=names, pending=pending, attempt=attempt)
+
+    def on_sample(self, sample, names, wait, duration, **kwargs):
+        end = time.perf_counter()
+        self.complete("wait", end - duration - wait, end - duration, sample=sample)
+        self.complete("read", end - duration, end, channels=names, sample=sample)
+
+    def on_step_end(self, step_data, **kwargs):
+        if self._step_start is not None:
+            self.complete("step", self._step_start, time.perf_counter(), step_index=step_data["step_index"],
+                          motor_values=step_data["motor_values"])
+            self._step_start = None
+
+    def to_dict(self):
+        with self._lock:
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self.threads.items()
+            ]
+            return {"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}
+
+    def save(self, trace_filename):
+        with open(trace_filename, "w", newline="", encoding="utf-8") as f_out:
+            json.dump(self.to_dict(), f_out, default=str)
+        scan_logger.info(f"Trace saved to file: {trace_filename}")
+        return trace_filename
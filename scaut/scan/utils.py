@@ -4,6 +4,7 @@ import csv
 import json
 import time
 import itertools
+import collections
 import logging
 import numpy as np
 from tqdm import tnrange, tqdm_notebook
@@ -15,10 +16,17 @@ import matplotlib.cm as cm
 from IPython.display import clear_output as cell_clear_output
 import pandas as pd
 import copy
+import contextlib
 from numbers import Number
+from collections.abc import Mapping, Sequence
 
 from ..core import config as cfg
-from .exceptions import ScanValueError
+from .exceptions import ScanValueError, ScanTimeoutError
+from .result import ScanResult, as_scan_result, json_default
+from .session import session_executor
+from .stats import SampleStats
+from .devices import as_adapter
+from .hooks import as_hooks
 
 scan_logger = logging.getLogger('Scan')
 
@@ -35,114 +43,338 @@ def create_output_path(prefix_path, name=None):
 
 def save_data(data_filename, data):
     with open(data_filename, "w", newline="", encoding="utf-8") as f_out:
-        json.dump(data, f_out)
+        json.dump(data, f_out, default=json_default)
         scan_logger.info(f"Data saved to file: {data_filename}")
 
 
-def set_motor_value(motor_name, motor_value, get_func, put_func, verify_motor, max_retries, delay, tolerance):
-    if verify_motor:
-        for attempt in range(max_retries):
-            put_func(motor_name, motor_value)
-            time.sleep(delay)
-            current_pos = get_func(motor_name)
-            scan_logger.debug(f"Attempting to set {motor_name} to {motor_value}. Current position: {current_pos}")
-            if abs(current_pos - motor_value) <= tolerance:
-                scan_logger.info(f"{motor_name} successfully set to {motor_value}.")
-                return True
-        raise RuntimeError(
-            f"Failed to set {motor_name} to {motor_value} "
-            f"after {max_retries} attempts."
-        )
+def create_journal_path(prefix_path, name=None):
+    stem = os.path.splitext(name)[0] if name else time.strftime('scan-%Y-%m-%d_%H-%M-%S')
+    return create_output_path(prefix_path, f"{stem}-{uuid.uuid4().hex[:8]}.jsonl")
+
+
+def repair_journal(journal_filename, chunk_size=4096):
+    with open(journal_filename, "r+b") as journal:
+        end = position = journal.seek(0, os.SEEK_END)
+        while position > 0:
+            size = min(chunk_size, position)
+            journal.seek(position - size)
+            newline = journal.read(size).rfind(b"\n")
+            if newline >= 0:
+                position += newline + 1 - size
+                break
+            position -= size
+        if position < end:
+            journal.truncate(position)
+            scan_logger.warning(f"Journal {journal_filename} ended with a partial record, dropped {end - position} bytes")
+
+
+def open_journal(journal_filename, header, steps=()):
+    if os.path.isfile(journal_filename):
+        repair_journal(journal_filename)
+    journal = open(journal_filename, "a", newline="", encoding="utf-8")
+    write_journal_record(journal, {"type": "header", "seeded_steps": len(steps), **header})
+    for step in steps:
+        write_journal_record(journal, {"type": "step", **step})
+    scan_logger.info(f"Journal opened: {journal_filename}")
+    return journal
+
+
+def write_journal_record(journal, record):
+    journal.write(json.dumps(record, default=json_default) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
+def read_journal(journal_filename):
+    with open(journal_filename, "r", encoding="utf-8") as f_in:
+        broken = None
+        for line_number, line in enumerate(f_in, 1):
+            if not line.strip():
+                continue
+            if broken is not None:
+                raise ValueError(f"Journal {journal_filename} has a corrupt record at line {broken}")
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                broken = line_number
+                continue
+            yield record
+        if broken is not None:
+            scan_logger.warning(f"Journal {journal_filename} ends with a partial record at line {broken}, ignoring it")
+
+
+def load_journal(journal_filename):
+    data, steps = {}, []
+    for record in read_journal(journal_filename):
+        record_type = record.pop("type", "step")
+        if record_type == "step":
+            steps.append(record)
+        else:
+            record.pop("seeded_steps", None)
+            data.update(record)
+    data["steps"] = steps
+    data["total_steps"] = len(steps)
+    return data
+
+
+def load_data(data_filename):
+    if data_filename.endswith(".jsonl"):
+        return load_journal(data_filename)
+    with open(data_filename, "r", encoding="utf-8") as f_in:
+        return json.load(f_in)
+
+
+def count_done_combinations(steps, motor_names):
+    done = collections.Counter()
+    for step in steps:
+        motor_values = step.get("motor_values", {})
+        if all(motor_name in motor_values for motor_name in motor_names):
+            done[tuple(motor_values[motor_name] for motor_name in motor_names)] += 1
+    return done
+
+
+def compact_journal(journal_filename, data_filename):
+    header, footer, seeded_steps, total_steps = {}, {}, 0, 0
+    steps = ScanResult()
+    tmp_filename = f"{data_filename}.tmp"
+    with open(tmp_filename, "w", newline="", encoding="utf-8") as f_out:
+        f_out.write('{"steps": [')
+        for record in read_journal(journal_filename):
+            record_type = record.pop("type", "step")
+            if record_type == "header":
+                seeded_steps = total_steps + record.pop("seeded_steps", 0)
+                header.update(record)
+            elif record_type == "footer":
+                footer.update(record)
+            else:
+                f_out.write((", " if total_steps else "") + json.dumps(record))
+                steps.append(record)
+                total_steps += 1
+        f_out.write("]")
+        header.update(footer)
+        start_step = header.get("start_step", seeded_steps)
+        for key, value in {**header, "data": steps.tree(start_step), "total_steps": total_steps}.items():
+            if key != "steps":
+                f_out.write(f", {json.dumps(key)}: {json.dumps(value, default=json_default)}")
+        f_out.write("}")
+    os.replace(tmp_filename, data_filename)
+    scan_logger.info(f"Journal {journal_filename} compacted to file: {data_filename}")
+    return data_filename
+
+
+def get_settle_profile(motor_name, settle_profiles=None):
+    settle_profiles = cfg.SCAN_SETTLE_PROFILES if settle_profiles is None else settle_profiles
+    prefix = max((prefix for prefix in settle_profiles if motor_name.startswith(prefix)), key=len, default=None)
+    return {**cfg.SCAN_SETTLE_PROFILE, **(settle_profiles[prefix] if prefix is not None else {})}
+
+
+def pause(seconds, watchdog=None):
+    if watchdog is not None:
+        watchdog.sleep(seconds)
     else:
-        put_func(motor_name, motor_value)
-        scan_logger.info(f"{motor_name} set to {motor_value} without verification.")
-        return True
+        time.sleep(seconds)
+
+
+def wait_motors_settled(motor_values, get_func, tolerance, settle_profiles, executor=None, watchdog=None):
+    start = time.monotonic()
+    polls = {motor_name: float(settle_profiles[motor_name]["poll"]) for motor_name in motor_values}
+    stable_reads = dict.fromkeys(motor_values, 0)
+    settled, pending = {}, list(motor_values)
+    while pending:
+        for motor_name, current_pos in zip(pending, read_meters(pending, get_func, executor)):
+            in_tolerance = abs(current_pos - motor_values[motor_name]) <= tolerance
+            stable_reads[motor_name] = stable_reads[motor_name] + 1 if in_tolerance else 0
+            scan_logger.debug(f"Settling {motor_name} to {motor_values[motor_name]}. Current position: {current_pos}, stable reads: {stable_reads[motor_name]}")
+            if stable_reads[motor_name] >= int(settle_profiles[motor_name]["stable_reads"]):
+                settled[motor_name] = time.monotonic()
+        elapsed = time.monotonic() - start
+        pending = [
+            motor_name for motor_name in pending
+            if motor_name not in settled
+            and elapsed + polls[motor_name] <= float(settle_profiles[motor_name]["timeout"])
+        ]
+        if not pending:
+            break
+        pause(min(polls[motor_name] for motor_name in pending), watchdog)
+        for motor_name in pending:
+            profile = settle_profiles[motor_name]
+            polls[motor_name] = min(polls[motor_name] * float(profile["backoff"]), float(profile["max_poll"]))
+    return settled
+
+
+def set_motor_value(motor_name, motor_value, get_func, put_func, verify_motor, max_retries, delay, tolerance,
+                    settle_profile=None):
+    settle_times = set_motors_values(
+        [motor_name], [motor_value], get_func, put_func, verify_motor, max_retries, delay, tolerance,
+        settle=settle_profile is not None, settle_profiles={motor_name: settle_profile or {}},
+    )
+    return settle_times[motor_name]
+
+
+def write_motors(motor_names, motor_values, put_func, executor=None):
+    as_adapter(put_func=put_func, executor=executor).put_many(motor_names, motor_values)
 
 
 def set_motors_values(motor_names, combination, get_func, put_func, verify_motor,
-                      max_retries, delay, tolerance, parallel=False):
-    if parallel:
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(
-                    set_motor_value,
-                    motor_name,
-                    motor_value,
-                    get_func,
-                    put_func,
-                    verify_motor,
-                    max_retries,
-                    delay,
-                    tolerance,
-                ): motor_name
-                for motor_name, motor_value in zip(motor_names, combination)
-            }
-            for future in tqdm_notebook(
-                concurrent.futures.as_completed(futures),
-                total=len(futures),
-                desc="Set motor values",
-                disable=cfg.TQDM_DISABLE,
-            ):
-                future.result()
-    else:
-        for motor_name, motor_value in tqdm_notebook(
-            zip(motor_names, combination),
-            total=len(motor_names),
-            desc="Set motor values",
-            disable=cfg.TQDM_DISABLE,
-        ):
-            set_motor_value(motor_name, motor_value, get_func, put_func,
-                    verify_motor, max_retries, delay, tolerance)
-            scan_logger.info(f"Motor '{motor_name}' set to value {motor_value}")
-            
+                      max_retries, delay, tolerance, parallel=False, session=None,
+                      settle=False, settle_profiles=None, hooks=None, watchdog=None):
+    start = time.monotonic()
+    hooks = as_hooks(hooks)
+    pending = dict(zip(motor_names, combination))
+    settle_times = {}
+    with session_executor(session) if parallel else contextlib.nullcontext() as executor:
+        if not verify_motor:
+            write_motors(list(pending), list(pending.values()), put_func, executor)
+            if hooks is not None:
+                hooks.emit("on_put", names=list(pending), values=list(pending.values()), attempt=0,
+                           duration=time.monotonic() - start)
+            scan_logger.info(f"Motors {list(pending)} set to {list(pending.values())} without verification.")
+            return dict.fromkeys(pending, time.monotonic() - start)
+
+        for attempt in tqdm_notebook(range(max_retries), desc="Set motor values", disable=cfg.TQDM_DISABLE):
+            if not pending:
+                break
+            put_start = time.monotonic()
+            write_motors(list(pending), list(pending.values()), put_func, executor)
+            if hooks is not None:
+                hooks.emit("on_put", names=list(pending), values=list(pending.values()), attempt=attempt,
+                           duration=time.monotonic() - put_start)
+            settle_start = time.monotonic()
+            if settle:
+                profiles = {motor_name: get_settle_profile(motor_name, settle_profiles) for motor_name in pending}
+                settled = wait_motors_settled(pending, get_func, tolerance, profiles, executor, watchdog)
+            else:
+                pause(delay, watchdog)
+                current_positions = read_meters(list(pending), get_func, executor)
+                scan_logger.debug(f"Attempt {attempt + 1} to set {pending}. Current positions: {current_positions}")
+                settled = {
+                    motor_name: time.monotonic() for motor_name, current_pos in zip(pending, current_positions)
+                    if abs(current_pos - pending[motor_name]) <= tolerance
+                }
+            if hooks is not None:
+                hooks.emit("on_settled", names=list(settled), pending=list(pending), attempt=attempt,
+                           duration=time.monotonic() - settle_start)
+            for motor_name, settled_at in settled.items():
+                settle_times[motor_name] = settled_at - start
+                scan_logger.info(f"Motor '{motor_name}' set to value {pending.pop(motor_name)}")
+
+    if pending:
+        raise RuntimeError(
+            f"Failed to set {', '.join(pending)} to {list(pending.values())} "
+            f"after {max_retries} attempts."
+        )
+    return settle_times
+
 
 def get_meter_data(meter, get_func, sample_size, delay):
-    values = []
-    for _ in range(sample_size):
-        values.append(get_func(meter))
-        time.sleep(delay)
-        
-    avg = sum(values) / sample_size
-    std = np.sqrt(sum((x - avg) ** 2 for x in values) / sample_size)
-    scan_logger.debug(f"Data collected for {meter}: avg = {avg}, std = {std}")
-    return meter, avg, std
-
-
-def get_meters_data(meters, get_func, sample_size, delay=0, parallel=False, limits=None, strict_check=False):
-    data, error_data = {}, {}
-    if parallel:
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(get_meter_data, meter, get_func, sample_size, delay): meter
-                for meter in meters
-            }
-            for future in tqdm_notebook(concurrent.futures.as_completed(futures),
-                               total=len(futures),
-                               desc="Collect data",
-                               disable=cfg.TQDM_DISABLE):
-                meter, avg, sem = future.result()
-                data[meter] = avg
-                error_data[meter] = sem
-    else:
-        for meter in tqdm_notebook(meters, desc="Collect data", disable=cfg.TQDM_DISABLE):
-            meter, avg, sem = get_meter_data(meter, get_func, sample_size, delay)
-            data[meter] = avg
-            error_data[meter] = sem
+    stats = sample_meters([meter], get_func, sample_size, delay)
+    return meter, float(stats.mean[0]), float(stats.std[0])
+
+
+def read_meters(meters, get_func, executor=None):
+    return as_adapter(get_func, executor=executor).get_many(meters)
+
+
+def sample_meters(meters, get_func, sample_size, delay=0, parallel=False, session=None,
+                  keep_samples=False, robust=False, limits=None, min_samples=None, max_samples=None,
+                  target_sem=None, target_rel_sem=None, monitor=None, trigger=None,
+                  watchdog=None, hooks=None):
+    meters, sample_size = list(meters), int(sample_size)
+    hooks = as_hooks(hooks)
+    adaptive = target_sem is not None or target_rel_sem is not None
+    min_samples = int(min_samples or cfg.SCAN_MIN_SAMPLES) if adaptive else sample_size
+    max_samples = int(max_samples or sample_size) if adaptive else sample_size
+    targets = adaptive_targets(meters, limits, target_sem, target_rel_sem)
+    stats = SampleStats(meters, max_samples, keep_samples or robust)
+    active = np.ones(len(meters), dtype=bool)
+    trigger_func, pulse = get_func, None
+    if monitor is not None:
+        get_func, counters = monitor.get, monitor.snapshot(meters)
+    with session_executor(session) if parallel else contextlib.nullcontext() as executor:
+        for sample in tqdm_notebook(range(max_samples), desc="Collect data", disable=cfg.TQDM_DISABLE):
+            if not active.any():
+                break
+            wait_start = time.monotonic()
+            if watchdog is not None:
+                watchdog.check()
+            if trigger is not None:
+                pulse = wait_trigger(trigger, trigger_func, pulse, watchdog=watchdog)
+                stats.pulses.append(pulse)
+            elif monitor is not None:
+                counters[active] = monitor.wait_updates(
+                    [meters[i] for i in np.flatnonzero(active)], counters[active],
+                )
+            elif sample:
+                pause(delay, watchdog)
+            read_start = time.monotonic()
+            names = [meters[i] for i in np.flatnonzero(active)]
+            values = read_meters(names, get_func, executor)
+            stats.update(values, active)
+            if hooks is not None:
+                hooks.emit("on_sample", sample=sample, names=names, values=values, wait=read_start - wait_start,
+                           duration=time.monotonic() - read_start)
+            if adaptive and sample + 1 >= min_samples:
+                active &= ~(stats.sem <= targets)
+    scan_logger.debug(f"Data collected for {meters}: avg = {stats.mean}, std = {stats.std}, samples = {stats.count}")
+    return stats
+
+
+def wait_trigger(trigger, get_func, last_pulse=None, poll=cfg.SCAN_TRIGGER_POLL, timeout=cfg.SCAN_TRIGGER_TIMEOUT,
+                 watchdog=None):
+    if last_pulse is None:
+        last_pulse = get_func(trigger)
+    deadline = time.monotonic() + float(timeout)
+    while True:
+        pulse = get_func(trigger)
+        if pulse != last_pulse:
+            if pulse - last_pulse > 1:
+                scan_logger.debug(f"Trigger '{trigger}' skipped {pulse - last_pulse - 1} pulses")
+            return pulse
+        if time.monotonic() > deadline:
+            raise ScanTimeoutError(f"Trigger '{trigger}' did not advance from {last_pulse} within {timeout} s")
+        pause(float(poll), watchdog)
+
+
+def adaptive_targets(meters, limits=None, target_sem=None, target_rel_sem=None):
+    targets = np.full(len(meters), np.inf)
+    if target_sem is not None:
+        targets[:] = float(target_sem)
+    if target_rel_sem is not None and limits:
+        widths = np.array([max(limit) - min(limit) if limit else np.inf for limit in limits], dtype=float)
+        targets = np.minimum(targets, float(target_rel_sem) * widths)
+    return targets
+
+
+def get_meters_data(meters, get_func, sample_size, delay=0, parallel=False, limits=None, strict_check=False,
+                    session=None, min_samples=None, max_samples=None, target_sem=None, target_rel_sem=None,
+                    hooks=None):
+    meters = list(meters)
+    stats = sample_meters(
+        meters, get_func, sample_size, delay, parallel, session, limits=limits, min_samples=min_samples,
+        max_samples=max_samples, target_sem=target_sem, target_rel_sem=target_rel_sem, hooks=hooks,
+    )
+    data, error_data = stats.as_dict(stats.mean), stats.as_dict(stats.std)
             
     if limits:
-        for meter_name, meter_range in zip(meters, limits):
-            measured_avg = data.get(meter_name, {})
-            lower_limit, upper_limit = min(meter_range), max(meter_range)
-            if measured_avg < lower_limit or measured_avg > upper_limit:
-                msg = (f"Device '{meter_name}' measured value = {measured_avg} "
-                       f"outside the allowed range ({lower_limit}, {upper_limit})")
-                scan_logger.warning(msg)
-                if strict_check:
-                    raise ScanValueError(msg)
+        check_limits(data, meters, limits, strict_check)
                     
     return data, error_data
 
 
+def check_limits(data, meters, limits, strict_check=False, metrics=None):
+    for meter_name, meter_range in zip(meters, limits):
+        measured_avg = data.get(meter_name, {})
+        lower_limit, upper_limit = min(meter_range), max(meter_range)
+        if measured_avg < lower_limit or measured_avg > upper_limit:
+            msg = (f"Device '{meter_name}' measured value = {measured_avg} "
+                   f"outside the allowed range ({lower_limit}, {upper_limit})")
+            scan_logger.warning(msg)
+            if metrics is not None:
+                metrics.inc_device("out_of_range", meter_name)
+            if strict_check:
+                raise ScanValueError(msg)
+
+
 def plot_scan_data(scan_data, step_range=None):
     all_steps = scan_data.get("steps", [])
     motors = scan_data.get("motors", [])
@@ -205,25 +437,19 @@ def plot_scan_data(scan_data, step_range=None):
 
 
 def print_table_scan_data(scan_data, step_range=None):
-    all_steps = scan_data.get("steps", [])
-    if step_range is not None:
-        min_index, max_index, step_size = step_range
-        steps = [step for step in all_steps
-                 if min_index <= step.get("step_index", 0) <= max_index][::step_size]
-    else:
-        steps = all_steps[-cfg.SCAN_SHOW_LAST_STEP_NUMBERS:]
+    steps = as_scan_result(scan_data.get("steps", []))
+    rows = steps.select(step_range)[::-1]
     
-    if not steps:
+    if not len(rows):
         return
     
-    table_data = []
-    for step in steps[::-1]:
-        row = {}
-        row.update({"Step": step.get('step_index', {})})
-        row.update(step.get("motor_values", {}))
-        row.update(step.get("meter_data", {}))
-        row.update(step.get("meter_errors", {}))
-        table_data.append(row)
+    table_data = {"Step": steps.step_index[rows]}
+    for key in ["motor_values", "meter_data", "meter_errors"]:
+        names = steps.names(key)
+        values = steps.matrix(key, names, rows)
+        for j, name in enumerate(names):
+            if not np.isnan(values[:, j]).all():
+                table_data[name] = values[:, j]
     
     df = pd.DataFrame(table_data)
     print("=== Scan Data Table ===\n")
@@ -254,20 +480,16 @@ def print_scan_data(scan_data, step_range=None):
 def plot_generic_data(scan_data, items_key, step_value_key, title, xlabel, ylabel,
                       step_range=None, limits_key=None, errors_key=None, fig_size_x=12, fig_size_y=6):
     items = scan_data.get(items_key, [])
-    all_steps = scan_data.get("steps", [])
-    if step_range is not None:
-        min_index, max_index, step_size = step_range
-        steps = [step for step in all_steps
-                 if min_index <= step.get("step_index", 0) <= max_index][::step_size]
-    else:
-        steps = all_steps[-cfg.SCAN_SHOW_LAST_STEP_NUMBERS:]
+    steps = as_scan_result(scan_data.get("steps", []))
+    rows = steps.select(step_range)
     
-    if not steps:
+    if not len(rows):
         return
         
-    step_numbers = [step.get("step_index") for step in steps]
-    last_step_index = steps[-1].get("step_index")
+    step_numbers = steps.step_index[rows].tolist()
+    last_step_index = step_numbers[-1]
     item_indices = range(len(items))
+    values = steps.matrix(step_value_key, items, rows, fill=0)
 
     cmap = cm.binary
     norm = mcolors.Normalize(vmin=min(step_numbers) - 1, vmax=max(step_numbers))
@@ -276,24 +498,21 @@ def plot_generic_data(scan_data, items_key, step_value_key, title, xlabel, ylabe
 
     fig, ax = plt.subplots(figsize=(fig_size_x, fig_size_y))
 
-    for step in steps:
-        step_index = step.get("step_index")
-        values_dict = step.get(step_value_key, {})
-        y_values = [values_dict.get(item, 0) for item in items]
+    for i, step_index in enumerate(step_numbers):
+        y_values = values[i]
         x_values = list(item_indices)
         color = scalar_map.to_rgba(step_index)
         marker = "." if step_index != last_step_index else "o"
         linestyle = "--" if step_index != last_step_index else "-"
         if errors_key and step_index == last_step_index:
-            errors_dict = step.get(errors_key, {})
-            y_errors = [errors_dict.get(item, 0) for item in items]
+            y_errors = steps.matrix(errors_key, items, rows[i:i + 1], fill=0)[0]
             ax.errorbar(x_values, y_values, yerr=y_errors, fmt=marker,
                         linestyle=linestyle, color=color, capsize=3)
         else:
             ax.plot(x_values, y_values, marker=marker, linestyle=linestyle, color=color)
 
         if limits_key and step_index == last_step_index:
-            limits_dict = step.get(limits_key, {}) or scan_data.get(limits_key, {})
+            limits_dict = steps[rows[i]].get(limits_key, {}) or scan_data.get(limits_key, {})
             for i, item in enumerate(items):
                 limits = limits_dict.get(item)
                 if limits is not None and isinstance(limits, (list, tuple)) and len(limits) == 2:
@@ -422,10 +641,10 @@ def transform_data(data, name_mapping={}, scale_factors={}, path=None):
         if path and path[-1] in scale_factors:
             return data * scale_factors[path[-1]]
         return data
-    elif not isinstance(data, (dict, list, tuple)):
+    elif not isinstance(data, (Mapping, Sequence)) or isinstance(data, (str, bytes)):
         return data
     
-    if isinstance(data, dict):
+    if isinstance(data, Mapping):
         result = {}
         for key, value in data.items():
             new_key = name_mapping.get(key, key)
@@ -437,7 +656,7 @@ def transform_data(data, name_mapping={}, scale_factors={}, path=None):
             result[new_key] = transform_data(value, name_mapping, scale_factors, new_path)
         return result
     
-    elif isinstance(data, (list, tuple)):
+    elif isinstance(data, Sequence):
         result = [transform_data(item, name_mapping, scale_factors, path) for item in data]
         return tuple(result) if isinstance(data, tuple) else result
     
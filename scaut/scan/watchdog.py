@@ -0,0 +1,123 @@
+import time
+import logging
+import threading
+
+import numpy as np
+
+from ..core import config as cfg
+from .exceptions import ScanValueError
+from .stats import SampleStats
+from .utils import read_meters
+
+scan_logger = logging.getLogger('Scan')
+
+WATCHDOG_ACTIONS = ("abort", "pause")
+
+
+class CheckWatchdog:
+    def __init__(self, checks, limits, get_func, period=cfg.SCAN_WATCHDOG_PERIOD, strict_check=False,
+                 action=cfg.SCAN_WATCHDOG_ACTION, metrics=None):
+        if action not in WATCHDOG_ACTIONS:
+            raise ValueError(f"Unknown watchdog action '{action}', expected one of {WATCHDOG_ACTIONS}")
+        self.checks = list(checks)
+        self.lower = np.array([min(limit) for limit in limits], dtype=float)
+        self.upper = np.array([max(limit) for limit in limits], dtype=float)
+        self.get_func = get_func
+        self.period = float(period)
+        self.strict_check = strict_check
+        self.action = action
+        self.metrics = metrics
+        self.values = np.full(len(self.checks), np.nan)
+        self.timestamp = None
+        self.error = None
+        self.violations = 0
+        self._stats = SampleStats(self.checks)
+        self._violating = np.zeros(len(self.checks), dtype=bool)
+        self._lock = threading.Lock()
+        self._clear = threading.Event()
+        self._clear.set()
+        self._tripped = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scaut-watchdog", daemon=True)
+        self._thread.start()
+        scan_logger.info(f"Watchdog started for {self.checks} every {self.period} s")
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.period):
+            try:
+                self.poll()
+            except Exception as e:
+                scan_logger.exception(f"Watchdog read failed: {e}")
+                if self.strict_check:
+                    self._trip(e)
+
+    def poll(self):
+        values = np.asarray(read_meters(self.checks, self.get_func), dtype=float)
+        violating = (values < self.lower) | (values > self.upper)
+        with self._lock:
+            self.values, self.timestamp = values, time.time()
+            self._stats.update(values)
+            self.violations += int(violating.any())
+        for i in np.flatnonzero(violating & ~self._violating):
+            msg = (f"Device '{self.checks[i]}' measured value = {values[i]} "
+                   f"outside the allowed range ({self.lower[i]}, {self.upper[i]})")
+            scan_logger.warning(msg)
+            if self.metrics is not None:
+                self.metrics.inc_device("out_of_range", self.checks[i])
+            if self.strict_check and self.action == "abort":
+                self._trip(ScanValueError(msg))
+        if self.strict_check and self.action == "pause":
+            if violating.any():
+                self._clear.clear()
+            elif not self._clear.is_set():
+                scan_logger.info("Checks back in range, resuming scan")
+                self._clear.set()
+        self._violating = violating
+
+    def _trip(self, error):
+        if self.error is None:
+            self.error = error
+        self._tripped.set()
+        self._clear.set()
+
+    def check(self):
+        if not self._clear.is_set():
+            scan_logger.warning("Scan paused until checks are back in range")
+            self._clear.wait()
+        if self.error is not None:
+            raise self.error
+
+    def sleep(self, seconds):
+        self._tripped.wait(seconds)
+        self.check()
+
+    def snapshot(self):
+        with self._lock:
+            stats, self._stats = self._stats, SampleStats(self.checks)
+            violations, self.violations = self.violations, 0
+            return {
+                "check_data": dict(zip(self.checks, self.values.tolist())),
+                "check_errors": stats.as_dict(stats.std),
+                "check_violations": violations,
+                "check_timestamp": self.timestamp,
+            }
+
+    def stop(self):
+        self._stop.set()
+        self._clear.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            scan_logger.info("Watchdog stopped")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="scaut-tests-")
+for _name, _default in [
+    ("DATA_DIR", "data"),
+    ("LOG_DIR", "logs"),
+    ("ELEGANT_SIMULATION_DIR", "elegant"),
+    ("SCAN_METRICS_FILE", "scaut.prom"),
+]:
+    os.environ.setdefault(_name, os.path.join(_workdir, _default))
@@ -0,0 +1,14 @@
+from scaut.scan.hooks import ScanHooks, TimingCollector, as_hooks
+
+
+def test_as_hooks_accepts_every_hook_form():
+    events = []
+    on_put = {"on_put": lambda **kwargs: events.append("put")}
+
+    assert as_hooks(on_put).hooks["on_put"]
+    assert as_hooks(TimingCollector()).hooks["on_step_end"]
+    merged = as_hooks(ScanHooks([on_put]), timing=True)
+    merged.emit("on_put", duration=0.0)
+    assert events == ["put"]
+    assert len(merged.hooks["on_step_end"]) == 1
+    assert as_hooks(None) is None
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from scaut.scan import scan
+from scaut.scan.utils import load_data, read_journal
+
+
+class FakeDevice:
+    def __init__(self):
+        self.state = {}
+
+    def get(self, name):
+        return self.state.get(name, 0.0) + (2 * self.state.get("M1", 0.0) if name == "B1" else 0.0)
+
+    def put(self, name, value):
+        self.state[name] = value
+
+
+def run_scan(device, path, **kwargs):
+    return scan(
+        meters=[("B1", [-100, 100])], motors=[("M1", [0.0, 1.0, 2.0, 3.0, 4.0])],
+        get_func=device.get, put_func=device.put, sample_size=2, delay=0, journal=True, path=str(path),
+        **kwargs,
+    )
+
+
+def tear_journal(journal_filename, steps):
+    with open(journal_filename, "r", encoding="utf-8") as f_in:
+        lines = f_in.readlines()
+    with open(journal_filename, "w", encoding="utf-8") as f_out:
+        f_out.writelines(lines[:1 + steps])
+        f_out.write(lines[1 + steps][:len(lines[1 + steps]) // 2])
+
+
+def test_resume_after_torn_journal_tail(tmp_path):
+    device = FakeDevice()
+    journal_filename = run_scan(device, tmp_path)["journal"]
+    tear_journal(journal_filename, 3)
+
+    result = run_scan(device, tmp_path, resume_from=journal_filename, save=True, name="resumed.json")
+
+    journal = load_data(journal_filename)
+    assert [step["motor_values"]["M1"] for step in journal["steps"]] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert "scan_end_time" in journal
+    assert list(read_journal(journal_filename))[-1]["type"] == "footer"
+
+    with open(result["path"], "r", encoding="utf-8") as f_in:
+        compacted = json.load(f_in)
+    assert compacted["total_steps"] == len(result["steps"]) == 5
+    assert sorted(result["data"]["M1"]) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert sorted(float(value) for value in compacted["data"]["M1"]) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert "scan_end_time" in compacted
+
+
+def test_read_journal_rejects_corrupt_inner_record(tmp_path):
+    journal_filename = tmp_path / "broken.jsonl"
+    journal_filename.write_text('{"type": "header"}\n{"type": "st\n{"type": "footer"}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(read_journal(str(journal_filename)))
@@ -0,0 +1,9 @@
+from scaut.scan.metrics import LatencyHistogram
+
+
+def test_export_buckets_keep_le_semantics():
+    histogram = LatencyHistogram([0.001, 0.0025])
+    for value in (0.00099, 0.001, 0.00102, 0.5):
+        histogram.record(value)
+    assert histogram.cumulative() == [2, 3]
+    assert histogram.count == 4
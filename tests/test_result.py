@@ -0,0 +1,16 @@
+import numpy as np
+
+from scaut.scan.result import ScanResult
+
+
+def test_int_table_is_promoted_by_later_floats():
+    steps = ScanResult([{"motor_values": {"M1": value}} for value in [0, 0.1, 0.2]])
+    np.testing.assert_allclose(steps.matrix("motor_values"), [[0.0], [0.1], [0.2]])
+    np.testing.assert_allclose(steps.column("motor_values", "M1"), [0.0, 0.1, 0.2])
+
+
+def test_column_and_matrix_read_values_kept_aside():
+    steps = ScanResult([{"a": {"x": 1.0}}, {"a": {"x": "n/a", "y": 2.5}}, {"a": 7}])
+    assert steps.names("a") == ["x", "y"]
+    np.testing.assert_allclose(steps.matrix("a"), [[1.0, np.nan], [np.nan, 2.5], [np.nan, np.nan]])
+    np.testing.assert_allclose(steps.column("a"), [np.nan, np.nan, 7.0])
@@ -0,0 +1,14 @@
+from scaut.scan import scan
+from scaut.scan.utils import transform_data
+
+
+def test_transform_data_walks_scan_results():
+    state = {}
+    data = scan(
+        meters=[("B1", [-100, 100])], motors=[("M1", [1.0, 2.0])],
+        get_func=lambda name: state.get(name, 0.0) + (state.get("M1", 0.0) if name == "B1" else 0.0),
+        put_func=state.__setitem__, sample_size=1, delay=0,
+    )
+    result = transform_data(data, {"B1": "BPM"}, {"BPM": 10})
+    assert [step["meter_data"] for step in result["steps"]] == [{"BPM": 10.0}, {"BPM": 20.0}]
+    assert result["data"]["M1"][2.0] == {"BPM": 20.0}